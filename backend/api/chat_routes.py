@@ -1,9 +1,12 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uuid
+import time
 import asyncio
 from backend.services.agent_service import agent_service
+from backend.core.config import settings
+from backend.core import telemetry
 import json
 import logging
 
@@ -19,19 +22,33 @@ class ChatRequest(BaseModel):
     query: str
     thread_id: str = "default"
 
+async def chat_turn(job_id: str, query: str, thread_id: str):
+    """Event payloads (JSON strings) of one agent turn; failures become an error event.
+
+    Shared by the SSE and WebSocket transports.
+    """
+    telemetry.ACTIVE_JOBS.inc()
+    try:
+        with telemetry.span("chat.turn", telemetry.CHAT_TURN, job_id=job_id, thread_id=thread_id):
+            # Use agent_service instead of chat_service
+            async for chunk in agent_service.stream_response(query, thread_id=thread_id):
+                yield chunk
+    except Exception as e:
+        logger.error(f"ERROR in process_chat: {e}")
+        yield json.dumps({"type": "error", "content": str(e)})
+    finally:
+        telemetry.ACTIVE_JOBS.dec()
+
 async def process_chat(job_id: str, query: str, thread_id: str = "default"):
     job = jobs.get(job_id)
     if not job:
         return
     queue = job["queue"]
+    telemetry.observe(telemetry.JOB_QUEUE_WAIT, time.perf_counter() - job["attached_at"], "chat.queue_wait", job_id=job_id)
     
     try:
-        # Use agent_service instead of chat_service
-        async for chunk in agent_service.stream_response(query, thread_id=thread_id):
+        async for chunk in chat_turn(job_id, query, thread_id):
             await queue.put(chunk)
-    except Exception as e:
-        logger.error(f"ERROR in process_chat: {e}")
-        await queue.put(json.dumps({"type": "error", "content": str(e)}))
     finally:
         await queue.put("[DONE]")
 
@@ -41,7 +58,8 @@ async def start_chat(request: ChatRequest):
     job_id = str(uuid.uuid4())
     jobs[job_id] = {
         "queue": asyncio.Queue(),
-        "query": request.query
+        "query": request.query,
+        "created_at": time.perf_counter()
     }
     return {"job_id": job_id}
 
@@ -53,26 +71,40 @@ async def stream_chat(job_id: str, thread_id: str = "default"):
 
     queue = job["queue"]
     query = job["query"]
+    job["attached_at"] = time.perf_counter()
+    telemetry.observe(telemetry.STREAM_ATTACH, job["attached_at"] - job["created_at"], "chat.stream_attach", job_id=job_id)
 
     # Start processing now that we have the thread_id
     asyncio.create_task(process_chat(job_id, query, thread_id))
 
     async def event_generator():
         # Send an initial message to confirm connection
-        yield f"data: {json.dumps({'type': 'status', 'content': 'connected'})}\n\n"
+        frame = f"data: {json.dumps({'type': 'status', 'content': 'connected'})}\n\n"
+        yield frame
         
+        # Every frame counts towards both sse_frames_total and sse_bytes_total
+        frames = 1
+        sent_bytes = len(frame.encode("utf-8"))
         try:
             while True:
                 data = await queue.get()
                 if data == "[DONE]":
-                    yield "data: [DONE]\n\n"
+                    frame = "data: [DONE]\n\n"
+                    yield frame
+                    frames += 1
+                    sent_bytes += len(frame)
                     break
                 # Ensure no internal newlines break the SSE format
                 # For JSON this is usually fine, but let's be safe
-                yield f"data: {data}\n\n"
+                frame = f"data: {data}\n\n"
+                frames += 1
+                sent_bytes += len(frame.encode("utf-8"))
+                yield frame
         except Exception as e:
-            print(f"SSE stream error: {e}")
+            logger.error(f"SSE stream error: {e}")
         finally:
+            telemetry.SSE_FRAMES.inc(frames)
+            telemetry.SSE_BYTES.inc(sent_bytes)
             if job_id in jobs:
                 del jobs[job_id]
 
@@ -85,3 +117,160 @@ async def stream_chat(job_id: str, thread_id: str = "default"):
             "X-Accel-Buffering": "no" # For Nginx
         }
     )
+
+# --- WebSocket transport -----------------------------------------------------
+#
+# One connection carries any number of concurrent turns (on any threads).
+# Client -> server (JSON text messages):
+#   {"op": "start", "j": <job id>, "q": <query>, "t": <thread id>}
+#   {"op": "cancel", "j": <job id>}
+#   {"op": "credit", "n": <frames>}     grant more frames (flow control)
+# Server -> client frames: {"j": <job id>, "s": <seq>, "e": <event>} where
+# event is the same payload the SSE stream sends (text / tool_call /
+# citation / error), and each job ends with {"type": "done"} or
+# {"type": "cancelled"}. seq counts frames per job from 0. The server sends
+# at most the granted credit (WS_INITIAL_CREDIT to start with); while the
+# client is out of credit, consecutive text events of a job are merged.
+# Connection-level frames (hello, protocol errors) have "j": null and are
+# not counted against credit.
+
+_DONE = json.dumps({"type": "done"})
+_CANCELLED = json.dumps({"type": "cancelled"})
+
+def _is_text(payload: str) -> bool:
+    return payload.startswith('{"type": "text"')
+
+def _coalesce(items):
+    """Merge text events into the job's previous text event, keeping per-job order."""
+    out = []
+    last = {}
+    for job, payload in items:
+        index = last.get(job)
+        if index is not None and _is_text(payload) and _is_text(out[index][1]):
+            merged = json.loads(out[index][1])["content"] + json.loads(payload)["content"]
+            out[index] = (job, json.dumps({"type": "text", "content": merged}))
+            continue
+        last[job] = len(out)
+        out.append((job, payload))
+    return out
+
+class ChatSocket:
+    """State of one multiplexed chat WebSocket: running jobs, outbound queue and credit."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.tasks = {}
+        # Bounded, so a client that stops granting credit back-pressures its agent turns
+        self.outbox = asyncio.Queue(maxsize=settings.WS_OUTBOX_SIZE)
+        self.credit = settings.WS_INITIAL_CREDIT
+        self.credit_granted = asyncio.Event()
+        self.closed = False
+
+    async def run(self):
+        await self.websocket.accept()
+        telemetry.WS_CONNECTIONS.inc()
+        await self._send_control({"type": "status", "content": "connected", "credit": self.credit,
+                                  "max_jobs": settings.WS_MAX_JOBS})
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                await self._handle(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"WebSocket chat error: {e}")
+        finally:
+            self.closed = True
+            telemetry.WS_CONNECTIONS.dec()
+            for task in list(self.tasks.values()):
+                task.cancel()
+            sender.cancel()
+
+    async def _send_control(self, event: dict):
+        await self.websocket.send_text(json.dumps({"j": None, "s": 0, "e": event}))
+
+    async def _handle(self, raw: str):
+        try:
+            message = json.loads(raw)
+            op = message.get("op")
+        except (ValueError, AttributeError):
+            await self._send_control({"type": "error", "content": "Invalid message"})
+            return
+
+        if op == "credit":
+            try:
+                self.credit += max(0, int(message.get("n", 0)))
+            except (TypeError, ValueError):
+                await self._send_control({"type": "error", "content": "credit needs an integer n"})
+                return
+            self.credit_granted.set()
+        elif op == "start":
+            job_id = str(message.get("j") or uuid.uuid4())
+            query = message.get("q")
+            if not query:
+                error = "start needs a query (q)"
+            elif job_id in self.tasks:
+                error = f"Job {job_id} is already running"
+            elif len(self.tasks) >= settings.WS_MAX_JOBS:
+                error = f"At most {settings.WS_MAX_JOBS} concurrent jobs per connection"
+            else:
+                error = None
+            if error:
+                await self._send_control({"type": "error", "content": error, "j": job_id})
+                return
+            thread_id = str(message.get("t") or "default")
+            self.tasks[job_id] = asyncio.create_task(self._run_job(job_id, query, thread_id))
+        elif op == "cancel":
+            task = self.tasks.get(str(message.get("j")))
+            if task:
+                task.cancel()
+        else:
+            await self._send_control({"type": "error", "content": f"Unknown op {op!r}"})
+
+    async def _run_job(self, job_id: str, query: str, thread_id: str):
+        terminal = _DONE
+        try:
+            async for chunk in chat_turn(job_id, query, thread_id):
+                await self.outbox.put((job_id, chunk))
+        except asyncio.CancelledError:
+            terminal = _CANCELLED
+        finally:
+            self.tasks.pop(job_id, None)
+        if not self.closed:
+            await self.outbox.put((job_id, terminal))
+
+    async def _send_loop(self):
+        try:
+            await self._send_frames()
+        except (WebSocketDisconnect, RuntimeError):
+            # Client went away; the receive loop cleans up
+            pass
+
+    async def _send_frames(self):
+        sequences = {}
+        pending = []
+        while True:
+            if not pending:
+                pending.append(await self.outbox.get())
+            while self.credit <= 0:
+                self.credit_granted.clear()
+                await self.credit_granted.wait()
+            while not self.outbox.empty():
+                pending.append(self.outbox.get_nowait())
+            pending = _coalesce(pending)
+            while pending and self.credit > 0:
+                job_id, payload = pending.pop(0)
+                seq = sequences.get(job_id, 0)
+                sequences[job_id] = seq + 1
+                frame = '{"j": %s, "s": %d, "e": %s}' % (json.dumps(job_id), seq, payload)
+                await self.websocket.send_text(frame)
+                self.credit -= 1
+                telemetry.WS_FRAMES.inc()
+                telemetry.WS_BYTES.inc(len(frame))
+                if payload in (_DONE, _CANCELLED):
+                    sequences.pop(job_id, None)
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """Multiplexed chat transport; see the protocol notes above. SSE remains at /stream/{job_id}."""
+    await ChatSocket(websocket).run()
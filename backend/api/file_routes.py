@@ -1,28 +1,145 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List
 from backend.services.file_service import file_service
+from backend.services.bulk_ingest import bulk_ingest
+from backend.services.page_service import page_cache
+import asyncio
+import json
 import os
+import re
 
 router = APIRouter(prefix="/api/pdf", tags=["files"]) # Keep prefix for now to avoid breaking frontend
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), mode: str = "upsert"):
+    if mode not in ("upsert", "replace"):
+        raise HTTPException(status_code=400, detail="mode must be 'upsert' or 'replace'")
+    try:
+        file_service.check_filename(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         content = await file.read()
-        file_path = await file_service.ingest_file(content, file.filename)
+        file_path = await file_service.ingest_file(content, file.filename, upsert=(mode == "upsert"))
         if not file_path:
             raise HTTPException(status_code=500, detail="Failed to process file")
-            
+
+        record = file_service.catalog.get(file.filename)
         return {
             "filename": file.filename,
             "status": "success",
-            "url": f"/api/pdf/files/{file.filename}"
+            "url": f"/api/pdf/files/{file.filename}",
+            "chunks": record.chunk_count if record else 0,
+            # "pending" while image / scanned-page text is still being OCR'd in the background
+            "ocr": record.ocr_status if record else None
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/upload/bulk")
+async def upload_bulk(files: List[UploadFile] = File(...), mode: str = "upsert"):
+    """Ingest many files and/or zip/tar archives in parallel.
+
+    Streams NDJSON: one line per ingested file (with done/total progress)
+    and a final summary line.
+    """
+    if mode not in ("upsert", "replace"):
+        raise HTTPException(status_code=400, detail="mode must be 'upsert' or 'replace'")
+    sources = [(file.filename, file.file) for file in files]
+
+    async def event_lines():
+        try:
+            async for event in bulk_ingest(sources, upsert=(mode == "upsert")):
+                yield json.dumps(event) + "\n"
+        finally:
+            for file in files:
+                await file.close()
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
 @router.post("/reset")
 async def reset_database():
-    success = file_service.reset_vector_store()
+    # Runs in a thread: it waits for the index writer to drain
+    success = await asyncio.to_thread(file_service.reset_vector_store)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to reset database")
     return {"message": "Database reset successfully"}
+
+@router.get("/documents")
+async def list_documents():
+    documents = file_service.list_documents()
+    return {
+        "count": len(documents),
+        "documents": [doc.summary() for doc in documents]
+    }
+
+@router.delete("/documents/{filename}")
+async def delete_document(filename: str):
+    if not await asyncio.to_thread(file_service.delete_document, filename):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"filename": filename, "status": "deleted"}
+
+def _page_request(filename: str, page: int):
+    record = file_service.catalog.get(filename)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if record.content_type != "pdf" or not record.page_count:
+        raise HTTPException(status_code=400, detail="Document has no pages")
+    if page < 1 or page > record.page_count:
+        raise HTTPException(status_code=404, detail=f"Page must be between 1 and {record.page_count}")
+    return record, os.path.join(file_service.upload_dir, filename)
+
+def _cache_headers(request: Request, record, page: int) -> dict:
+    # Versioned URLs (?v=<digest prefix>) never change content (once OCR is done), so they can be cached forever
+    version = request.query_params.get("v")
+    if version and record.digest.startswith(version) and record.ocr_status != "pending":
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "no-cache"
+    return {"ETag": page_cache.etag(record, page), "Cache-Control": cache_control}
+
+def _bytes_response(request: Request, data: bytes, media_type: str, headers: dict) -> Response:
+    """Serve in-memory content, honouring a single "bytes=start-end" Range request."""
+    headers = dict(headers, **{"Accept-Ranges": "bytes"})
+    size = len(data)
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", request.headers.get("range", "").strip())
+    if not match or match.groups() == ("", ""):
+        return Response(content=data, media_type=media_type, headers=headers)
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    if start > end:
+        return Response(status_code=416, headers=dict(headers, **{"Content-Range": f"bytes */{size}"}))
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+@router.get("/documents/{filename}/pages/{page}")
+async def get_page_pdf(filename: str, page: int, request: Request):
+    """Single-page PDF slice of a document, for the citation viewer."""
+    record, source_path = _page_request(filename, page)
+    headers = _cache_headers(request, record, page)
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    data = await asyncio.to_thread(page_cache.page_pdf, record, source_path, page)
+    return _bytes_response(request, data, "application/pdf", headers)
+
+@router.get("/documents/{filename}/pages/{page}/text")
+async def get_page_text(filename: str, page: int, request: Request):
+    """Extracted text of a single page."""
+    record, source_path = _page_request(filename, page)
+    headers = _cache_headers(request, record, page)
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    text = await asyncio.to_thread(page_cache.page_text, record, source_path, page)
+    return Response(
+        content=text,
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
@@ -29,17 +29,90 @@ class Settings:
     GROQ_API_KEY: str = os.environ.get("GROQ_API_KEY", "")
     OPEN_WEATHER_API_KEY: str = os.environ.get("OPEN_WEATHER_API_KEY", "")
 
+    # "groq", or "fake" for the scripted offline model in services/fake_llm.py
+    LLM_PROVIDER: str = os.environ.get("LLM_PROVIDER", "groq")
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", 50))
+    FAKE_LLM_FIRST_TOKEN_LATENCY: float = float(os.environ.get("FAKE_LLM_FIRST_TOKEN_LATENCY", 0.2))
+    FAKE_LLM_RESPONSE_TOKENS: int = int(os.environ.get("FAKE_LLM_RESPONSE_TOKENS", 60))
+    FAKE_LLM_TOOL_PATTERN: str = os.environ.get("FAKE_LLM_TOOL_PATTERN", "none")  # none | search | list | mixed
+
     GROQ_MODEL: str = os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant")
     GROQ_TEMPERATURE: float = float(os.environ.get("GROQ_TEMPERATURE", 0.2))
 
     # Chroma
     CHROMA_PERSIST_DIR: str = os.environ.get("CHROMA_PERSIST_DIR", "backend/chroma_db")
 
+    # Vector store backend: "chroma" or "numpy" (memory-mapped brute-force index)
+    VECTOR_BACKEND: str = os.environ.get("VECTOR_BACKEND", "chroma")
+    VECTOR_INDEX_DIR: str = os.environ.get("VECTOR_INDEX_DIR", "backend/vector_index")
+    VECTOR_INDEX_DTYPE: str = os.environ.get("VECTOR_INDEX_DTYPE", "int8")  # int8 | float16
+    VECTOR_INDEX_RESCORE: bool = os.environ.get("VECTOR_INDEX_RESCORE", "false").lower() == "true"
+    # Keep a dequantized float32 copy in RAM to score queries against (4 bytes
+    # per dimension per row); false scores the memory-mapped files directly
+    VECTOR_INDEX_RESIDENT: bool = os.environ.get("VECTOR_INDEX_RESIDENT", "true").lower() == "true"
+
+    # Document catalog (per-document registry, persisted next to the active
+    # backend's store so switching VECTOR_BACKEND does not load the other's chunk ids)
+    CATALOG_PATH: str = os.environ.get("CATALOG_PATH", os.path.join(
+        VECTOR_INDEX_DIR if VECTOR_BACKEND == "numpy" else CHROMA_PERSIST_DIR, "catalog.json"))
+    DOCUMENT_TTL_SECONDS: int = int(os.environ.get("DOCUMENT_TTL_SECONDS", 3600))
+    CLEANUP_INTERVAL_SECONDS: int = int(os.environ.get("CLEANUP_INTERVAL_SECONDS", 300))
+
     # Embeddings
+    # "fastembed", or "fake" for deterministic offline vectors (tests and load runs)
+    EMBEDDING_PROVIDER: str = os.environ.get("EMBEDDING_PROVIDER", "fastembed")
     EMBEDDING_MODEL: str = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-    EMBED_CHUNK_SIZE: int = int(os.environ.get("EMBED_CHUNK_SIZE", 256))
+    # Structure-aware chunking (services/chunker.py): chunks aim for
+    # CHUNK_TARGET_TOKENS (estimated); a single paragraph or code block up to
+    # CHUNK_MAX_TOKENS is kept whole. CHUNK_MAX_CHARS caps every chunk whatever
+    # the estimate says (text without spaces, long unbroken strings), keeping
+    # it within the embedding model's 512-token window even at ~2 chars/token.
+    # The default 40 yields about as many chunks as the old 256-char splitter
+    # (it was tuned on the hashing proxy, not the production model; see
+    # README). Larger targets mean fewer embeddings but dilute one-sentence
+    # facts: check recall (ingest_bench.py --embeddings fastembed) before raising it.
+    CHUNK_TARGET_TOKENS: int = int(os.environ.get("CHUNK_TARGET_TOKENS", 40))
+    CHUNK_MAX_TOKENS: int = int(os.environ.get("CHUNK_MAX_TOKENS", 60))
+    CHUNK_MAX_CHARS: int = int(os.environ.get("CHUNK_MAX_CHARS", 1000))
     MAX_ROWS_SAMPLE: int = int(os.environ.get("MAX_ROWS_SAMPLE", 3))
+
+    # Write-behind indexing: chunks from concurrent ingests are coalesced into
+    # batches of up to INDEX_BATCH_SIZE, waiting at most INDEX_FLUSH_INTERVAL_MS
+    INDEX_BATCH_SIZE: int = int(os.environ.get("INDEX_BATCH_SIZE", 512))
+    INDEX_FLUSH_INTERVAL_MS: int = int(os.environ.get("INDEX_FLUSH_INTERVAL_MS", 20))
     
+    # Bulk upload (/api/pdf/upload/bulk): files ingested in parallel and size limits
+    BULK_INGEST_CONCURRENCY: int = int(os.environ.get("BULK_INGEST_CONCURRENCY", 4))
+    BULK_MAX_FILES: int = int(os.environ.get("BULK_MAX_FILES", 1000))
+    BULK_MAX_FILE_BYTES: int = int(os.environ.get("BULK_MAX_FILE_BYTES", 50 * 1024 * 1024))
+    BULK_MAX_TOTAL_BYTES: int = int(os.environ.get("BULK_MAX_TOTAL_BYTES", 500 * 1024 * 1024))
+
+    # Deferred OCR of images and text-less PDF pages: "easyocr" (optional
+    # dependency), "stub" (offline tests) or "none"
+    OCR_ENGINE: str = os.environ.get("OCR_ENGINE", "easyocr")
+    OCR_LANGUAGES: str = os.environ.get("OCR_LANGUAGES", "en")
+    OCR_CONCURRENCY: int = int(os.environ.get("OCR_CONCURRENCY", 1))
+    OCR_NICE: int = int(os.environ.get("OCR_NICE", 10))
+    OCR_CACHE_DIR: str = os.environ.get("OCR_CACHE_DIR", "backend/ocr_cache")
+
+    # Page slices served to the citation viewer
+    PAGE_CACHE_DIR: str = os.environ.get("PAGE_CACHE_DIR", "backend/page_cache")
+    PAGE_CACHE_MAX_BYTES: int = int(os.environ.get("PAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+    # Startup: warm the embedding model and agent graph in the background
+    WARMUP_ON_STARTUP: bool = os.environ.get("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+    # Tracing: Prometheus metrics are always on at /api/metrics; OpenTelemetry
+    # spans are exported over OTLP (OTEL_EXPORTER_OTLP_* env vars) when enabled
+    OTEL_ENABLED: bool = os.environ.get("OTEL_ENABLED", "false").lower() == "true"
+    OTEL_SERVICE_NAME: str = os.environ.get("OTEL_SERVICE_NAME", "ai-chat-backend")
+
+    # WebSocket chat transport (/api/chat/ws): initial flow-control credit in
+    # frames, concurrent jobs per connection and outbound queue size
+    WS_INITIAL_CREDIT: int = int(os.environ.get("WS_INITIAL_CREDIT", 256))
+    WS_MAX_JOBS: int = int(os.environ.get("WS_MAX_JOBS", 16))
+    WS_OUTBOX_SIZE: int = int(os.environ.get("WS_OUTBOX_SIZE", 256))
+
     # Chat History
     CHAT_HISTORY_LIMIT: int = int(os.environ.get("CHAT_HISTORY_LIMIT", 10))
 
@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from backend.core.config import settings
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+# Dedicated registry so /api/metrics only exposes this app's series
+REGISTRY = CollectorRegistry()
+
+# Latency buckets from 1ms to ~1 minute
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CHAT_TURN = Histogram("chat_turn_seconds", "End-to-end duration of a chat turn", buckets=LATENCY_BUCKETS, registry=REGISTRY)
+JOB_QUEUE_WAIT = Histogram("chat_job_queue_wait_seconds", "Time from stream attach until the job starts running",
+                           buckets=LATENCY_BUCKETS, registry=REGISTRY)
+STREAM_ATTACH = Histogram("chat_stream_attach_seconds", "Time from job creation (POST) to stream attach (GET)",
+                          buckets=LATENCY_BUCKETS, registry=REGISTRY)
+LLM_TTFT = Histogram("agent_llm_ttft_seconds", "Time to first streamed token of an agent-node LLM call",
+                     buckets=LATENCY_BUCKETS, registry=REGISTRY)
+LLM_DURATION = Histogram("agent_llm_duration_seconds", "Total duration of an agent-node LLM call",
+                         buckets=LATENCY_BUCKETS, registry=REGISTRY)
+LLM_TOKENS = Counter("agent_llm_tokens_total", "LLM tokens by kind (prompt, completion)", ["kind"], registry=REGISTRY)
+TOOL_DURATION = Histogram("agent_tool_seconds", "Tool execution time", ["tool"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+RETRIEVAL_STAGE = Histogram("retrieval_stage_seconds", "Retrieval sub-stage time (embed_query, search)", ["stage"],
+                            buckets=LATENCY_BUCKETS, registry=REGISTRY)
+INGEST_STAGE = Histogram("ingest_stage_seconds", "Ingest stage time (extract, chunk, index)", ["stage"],
+                         buckets=LATENCY_BUCKETS, registry=REGISTRY)
+INDEX_FLUSH = Histogram("index_flush_seconds", "Write-behind index flush time (embed + commit)",
+                        buckets=LATENCY_BUCKETS, registry=REGISTRY)
+INDEX_FLUSH_CHUNKS = Histogram("index_flush_chunks", "Chunks committed per index flush",
+                               buckets=(1, 8, 32, 64, 128, 256, 512, 1024, 2048), registry=REGISTRY)
+OCR_SECONDS = Histogram("ocr_seconds", "OCR engine time per image (cache misses only)",
+                        buckets=LATENCY_BUCKETS, registry=REGISTRY)
+OCR_PENDING = Gauge("ocr_pending_jobs", "Documents queued or running OCR", registry=REGISTRY)
+SSE_FRAMES = Counter("sse_frames_total", "SSE frames sent", registry=REGISTRY)
+SSE_BYTES = Counter("sse_bytes_total", "SSE payload bytes sent", registry=REGISTRY)
+WS_FRAMES = Counter("ws_frames_total", "WebSocket chat frames sent", registry=REGISTRY)
+WS_BYTES = Counter("ws_bytes_total", "WebSocket chat payload bytes sent", registry=REGISTRY)
+WS_CONNECTIONS = Gauge("ws_connections", "Open chat WebSocket connections", registry=REGISTRY)
+ACTIVE_JOBS = Gauge("chat_active_jobs", "Chat jobs currently running", registry=REGISTRY)
+THREADS = Gauge("process_threads", "Live Python threads", registry=REGISTRY)
+THREADS.set_function(threading.active_count)
+
+_tracer = None
+
+
+def _init_tracing():
+    """Configure OpenTelemetry when OTEL_ENABLED is set and the SDK is installed."""
+    global _tracer
+    if not settings.OTEL_ENABLED:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        logger.warning(f"OTEL_ENABLED is set but OpenTelemetry is not installed ({e}); tracing disabled")
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("backend")
+    logger.info("OpenTelemetry tracing enabled")
+
+
+_init_tracing()
+
+
+@contextmanager
+def span(name: str, histogram: Optional[Histogram] = None, labels: Optional[dict] = None, **attributes):
+    """Time a block into `histogram` and, when tracing is enabled, an OpenTelemetry span."""
+    started = time.perf_counter()
+    context = _tracer.start_as_current_span(name, attributes=attributes) if _tracer is not None else nullcontext()
+    with context:
+        try:
+            yield
+        finally:
+            if histogram is not None:
+                (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+
+def observe(histogram: Histogram, seconds: float, name: Optional[str] = None, labels: Optional[dict] = None, **attributes):
+    """Record an already-measured duration (and a span covering it, when tracing)."""
+    (histogram.labels(**labels) if labels else histogram).observe(seconds)
+    if _tracer is not None and name:
+        end = time.time_ns()
+        _tracer.start_span(name, attributes=attributes, start_time=end - int(seconds * 1e9)).end(end_time=end)
+
+
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
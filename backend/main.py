@@ -1,17 +1,67 @@
 import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from backend.api.file_routes import router as file_router
 from backend.api.chat_routes import router as chat_router
+from backend.core.config import settings
+from backend.core.telemetry import render_metrics
+from backend.services.file_service import file_service
+from backend.services.agent_service import agent_service
+from backend.services.ocr_service import ocr_queue
 from dotenv import load_dotenv
 load_dotenv()
 
-app = FastAPI(title="AI Search Chat API")
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+# Component name -> "pending" | "warm" | "error: ..."
+warmup_state = {"embeddings": "pending", "agent": "pending"}
+
+async def warmup():
+    """Load heavy resources in the background so startup is not blocked on them."""
+    started = time.perf_counter()
+    for name, fn in (("embeddings", file_service.warmup), ("agent", agent_service.warmup)):
+        try:
+            await asyncio.to_thread(fn)
+            warmup_state[name] = "warm"
+        except Exception as e:
+            logger.error(f"Warmup of {name} failed: {e}")
+            warmup_state[name] = f"error: {e}"
+    logger.info(f"Warmup finished in {time.perf_counter() - started:.2f}s")
+
+async def periodic_cleanup():
+    while True:
+        await asyncio.sleep(settings.CLEANUP_INTERVAL_SECONDS)
+        # Expire documents older than the retention window (1 hour by default)
+        await asyncio.to_thread(file_service.expire_documents, settings.DOCUMENT_TTL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(periodic_cleanup())]
+    # OCR jobs interrupted by the last shutdown
+    if ocr_queue.enabled:
+        ocr_queue.resume_pending()
+    if settings.WARMUP_ON_STARTUP:
+        tasks.append(asyncio.create_task(warmup()))
+    yield
+    for task in tasks:
+        task.cancel()
+    ocr_queue.shutdown()
+    # Commit anything still queued for the vector store, then the catalog
+    await asyncio.to_thread(file_service.index_writer.close, 30)
+    await asyncio.to_thread(file_service.catalog.close)
+
+app = FastAPI(title="AI Search Chat API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=os.getenv("CORS_ALLOWED_ORIGINS").split(","),
+    allow_origins=os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:3000").split(","),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -28,17 +78,29 @@ async def root():
     return {"message": "AI Search Chat API is running"}
 
 @app.get("/api/health")
+@app.get("/api/health/live")
 async def health_check():
+    """Liveness: the process is up and serving requests."""
     return {"status": "success"}
 
-import asyncio
-from backend.services.file_service import file_service
-
-async def periodic_cleanup():
-    while True:
-        await asyncio.sleep(3600) # 1 hour
-        file_service.reset_vector_store()
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Readiness: heavy components are loaded and warm."""
+    status = file_service.status()
+    components = {
+        "embeddings": "warm" if status["warm"] or status["embeddings"] else warmup_state["embeddings"],
+        "vector_store": "warm" if status["vector_store"] else "pending",
+        "agent": "warm" if agent_service.is_ready else warmup_state["agent"],
+        "catalog": "warm",
+    }
+    ready = all(state == "warm" for state in components.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "components": components}
+    )
 
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(periodic_cleanup())
+@app.get("/api/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -1,26 +1,20 @@
 from typing import Annotated, Sequence, TypedDict, Union, List
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
 from langchain_core.tools import tool
-from langchain_groq import ChatGroq
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
+from langgraph.constants import END
 from backend.core.config import settings
 from backend.services.file_service import file_service
-from langchain_core.tools import create_retriever_tool
 import json
 import logging
 import os
 import asyncio
+import threading
+import time
+from backend.core import telemetry
 
 # Setup logger
 logger = logging.getLogger("uvicorn.error")
 
-# 1. Define State
-class AgentState(TypedDict):
-    messages: Annotated[list, add_messages]
-
 # 2. Define Tools
 # 2. Define Tools
 @tool
@@ -29,28 +23,32 @@ async def search_documents(query: str):
     Use this to answer questions based on the document content. 
     Always cite your sources using [1], [2], etc. based on the filenames provided in the search results."""
     if not query or len(query.strip()) < 2:
-        logger.warning("DEBUG: Empty or too short query provided to search_documents")
+        logger.warning("Empty or too short query provided to search_documents")
         return "Please provide a more specific search query to find information in the documents."
         
-    logger.info(f"DEBUG: Searching documents for query: '{query}'")
-    retriever = file_service.get_retriever()
+    logger.debug("Searching documents for query: %r", query)
     try:
-        docs = await retriever.ainvoke(query)
-        logger.info(f"DEBUG: Retriever returned {len(docs)} documents")
+        docs = await file_service.asearch(query)
+        logger.debug("Retriever returned %d documents", len(docs))
     except Exception as e:
-        logger.error(f"DEBUG: Retriever error: {e}")
+        logger.error(f"Retriever error: {e}")
         return f"Error searching documents: {e}"
     
     if not docs:
-        logger.warning(f"DEBUG: No documents found for query: '{query}'")
+        logger.warning(f"No documents found for query: '{query}'")
         return "No relevant information found in the uploaded documents for this specific query. Try a different search term or use list_documents to see what's available."
     
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, doc in enumerate(docs):
+            logger.debug("Found doc %d from %s (length: %d)", i + 1, doc.metadata.get("source"), len(doc.page_content))
+
     results = []
-    for i, doc in enumerate(docs):
+    for doc in docs:
         source = doc.metadata.get("source", "unknown")
+        page = doc.metadata.get("page")
         content = doc.page_content
-        logger.info(f"DEBUG: Found doc {i+1} from {source} (length: {len(content)})")
-        results.append(f"Source: {source}\nContent: {content}")
+        page_line = f"Page: {page}\n" if page else ""
+        results.append(f"Source: {source}\n{page_line}Content: {content}")
     
     return "\n\n---\n\n".join(results)
 
@@ -58,34 +56,50 @@ async def search_documents(query: str):
 async def list_documents():
     """Returns a list of all documents currently uploaded and available in the system. 
     Use this when the user asks what files they have uploaded or to see a list of available documents."""
-    logger.info("DEBUG: Listing all documents")
-    # This is a bit tricky with Chroma as a retriever, but we can get all unique sources from the vector store
-    # For now, we'll use a simpler approach: list files in the uploads directory
+    logger.debug("Listing all documents")
     try:
-        files = os.listdir("backend/uploads")
-        if not files:
+        documents = file_service.list_documents()
+        if not documents:
             return "No documents have been uploaded yet."
-        return "Currently uploaded documents:\n" + "\n".join([f"- {f}" for f in files])
+        lines = []
+        for doc in documents:
+            details = [doc.content_type.upper(), f"{doc.size / 1024:.1f} KB"]
+            if doc.page_count:
+                details.append(f"{doc.page_count} pages")
+            details.append(f"{doc.chunk_count} chunks")
+            if doc.ocr_status == "pending":
+                details.append("text recognition in progress")
+            lines.append(f"- {doc.filename} ({', '.join(details)})")
+        return "Currently uploaded documents:\n" + "\n".join(lines)
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
         return "Error retrieving document list."
 
 tools = [search_documents, list_documents]
 
-# 3. Define Model
-model = ChatGroq(
-    temperature=settings.GROQ_TEMPERATURE,
-    model_name=settings.GROQ_MODEL,
-    api_key=settings.GROQ_API_KEY,
-    streaming=True
-)
-model = model.bind_tools(tools)
+# 3. Define Model (built on first use so importing this module stays cheap)
+_model = None
+
+def get_model():
+    global _model
+    if _model is None and settings.LLM_PROVIDER == "fake":
+        from backend.services.fake_llm import fake_model_from_settings
+        _model = fake_model_from_settings().bind_tools(tools)
+    if _model is None:
+        from langchain_groq import ChatGroq
+        _model = ChatGroq(
+            temperature=settings.GROQ_TEMPERATURE,
+            model_name=settings.GROQ_MODEL,
+            api_key=settings.GROQ_API_KEY,
+            streaming=True
+        ).bind_tools(tools)
+    return _model
 
 # 4. Define Nodes
-async def agent(state: AgentState, config):
+async def agent(state, config):
     messages = state["messages"]
     thread_id = config.get("configurable", {}).get("thread_id", "unknown")
-    print(f"DEBUG: Agent node - thread_id: {thread_id}, message count: {len(messages)}")
+    logger.debug("Agent node - thread_id: %s, message count: %d", thread_id, len(messages))
     
     # Always prepend system message for every model call to ensure instructions are followed
     system_prompt = SystemMessage(content="""You are a professional AI assistant for searching and analyzing uploaded documents.
@@ -104,7 +118,7 @@ Your goal is to provide accurate, concise, and well-formatted answers.
     messages_with_system = [system_prompt] + messages
     
     try:
-        response = await model.ainvoke(messages_with_system, config=config)
+        response = await get_model().ainvoke(messages_with_system, config=config)
         return {"messages": [response]}
     except Exception as e:
         error_msg = str(e)
@@ -112,7 +126,7 @@ Your goal is to provide accurate, concise, and well-formatted answers.
             return {"messages": [AIMessage(content="I'm sorry, but I've reached my rate limit for now. Please try again in a few moments.")]}
         raise e
 
-def should_continue(state: AgentState):
+def should_continue(state):
     messages = state["messages"]
     last_message = messages[-1]
     if last_message.tool_calls:
@@ -120,28 +134,59 @@ def should_continue(state: AgentState):
     return END
 
 # 5. Define Graph
-workflow = StateGraph(AgentState)
+def build_app():
+    """Compile the agent graph. langgraph is imported here because it is slow to import."""
+    from langgraph.graph import StateGraph
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph.message import add_messages
+    from langgraph.prebuilt import ToolNode
+
+    class AgentState(TypedDict):
+        messages: Annotated[list, add_messages]
+
+    workflow = StateGraph(AgentState)
 
-workflow.add_node("agent", agent)
-workflow.add_node("tools", ToolNode(tools))
+    workflow.add_node("agent", agent)
+    workflow.add_node("tools", ToolNode(tools))
 
-workflow.set_entry_point("agent")
+    workflow.set_entry_point("agent")
 
-workflow.add_conditional_edges(
-    "agent",
-    should_continue,
-    {
-        "tools": "tools",
-        END: END
-    }
-)
+    workflow.add_conditional_edges(
+        "agent",
+        should_continue,
+        {
+            "tools": "tools",
+            END: END
+        }
+    )
 
-workflow.add_edge("tools", "agent")
+    workflow.add_edge("tools", "agent")
 
-memory = MemorySaver()
-app = workflow.compile(checkpointer=memory)
+    memory = MemorySaver()
+    return workflow.compile(checkpointer=memory)
 
 class AgentService:
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def app(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    get_model()
+                    self._app = build_app()
+        return self._app
+
+    @property
+    def is_ready(self) -> bool:
+        return self._app is not None
+
+    def warmup(self):
+        """Build the model client and compile the graph ahead of the first request."""
+        return self.app
+
     async def stream_response(self, query: str, thread_id: str = "default"):
         inputs = {"messages": [HumanMessage(content=query)]}
         config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
@@ -153,11 +198,24 @@ class AgentService:
         
         text_yielded = False
         last_yield_time = asyncio.get_event_loop().time()
+        # run_id -> start time, for LLM and tool latency metrics
+        llm_started = {}
+        llm_first_token = set()
+        tool_started = {}
         
+        # Building the graph (or waiting on warmup's lock) blocks: keep it off the event loop
+        app = self._app or await asyncio.to_thread(lambda: self.app)
         async for event in app.astream_events(inputs, version="v2", config=config):
             kind = event["event"]
             
-            if kind == "on_chat_model_stream":
+            if kind == "on_chat_model_start":
+                llm_started[event["run_id"]] = time.perf_counter()
+
+            elif kind == "on_chat_model_stream":
+                run_id = event["run_id"]
+                if run_id in llm_started and run_id not in llm_first_token:
+                    llm_first_token.add(run_id)
+                    telemetry.observe(telemetry.LLM_TTFT, time.perf_counter() - llm_started[run_id], "llm.first_token")
                 content = event["data"]["chunk"].content
                 if content:
                     text_yielded = True
@@ -166,6 +224,14 @@ class AgentService:
             
             elif kind == "on_chat_model_end":
                 output = event["data"].get("output")
+                run_id = event["run_id"]
+                llm_first_token.discard(run_id)
+                if run_id in llm_started:
+                    telemetry.observe(telemetry.LLM_DURATION, time.perf_counter() - llm_started.pop(run_id), "llm.call")
+                usage = getattr(output, "usage_metadata", None)
+                if usage:
+                    telemetry.LLM_TOKENS.labels(kind="prompt").inc(usage.get("input_tokens", 0))
+                    telemetry.LLM_TOKENS.labels(kind="completion").inc(usage.get("output_tokens", 0))
                 if output and not text_yielded:
                     content = getattr(output, "content", None)
                     if content:
@@ -174,28 +240,41 @@ class AgentService:
                         yield json.dumps({"type": "text", "content": content})
             
             elif kind == "on_tool_start":
+                tool_started[event["run_id"]] = time.perf_counter()
                 tool_name = event["name"]
                 status_msg = "Searching documents..." if tool_name == "search_documents" else f"Using {tool_name}..."
                 yield json.dumps({"type": "tool_call", "content": status_msg})
                 last_yield_time = asyncio.get_event_loop().time()
             
             elif kind == "on_tool_end":
+                if event["run_id"] in tool_started:
+                    telemetry.observe(telemetry.TOOL_DURATION, time.perf_counter() - tool_started.pop(event["run_id"]),
+                                      f"tool.{event['name']}", {"tool": event["name"]})
                 if event["name"] == "search_documents":
                     output = event["data"].get("output")
+                    # ToolNode reports a ToolMessage; direct tool calls report the string
+                    output = getattr(output, "content", output)
                     if output and isinstance(output, str):
                         import re
-                        sources = re.findall(r"Source: (.*?)\n", output)
-                        for source in sources:
+                        sources = re.findall(r"Source: (.*?)\n(?:Page: (\d+)\n)?", output)
+                        for source, page in sources:
                             filename = os.path.basename(source)
                             if filename not in seen_citations:
                                 citation_count += 1
                                 seen_citations.add(filename)
-                                yield json.dumps({
+                                citation = {
                                     "type": "citation", 
                                     "id": citation_count, 
                                     "text": filename, 
                                     "link": filename
-                                })
+                                }
+                                if page:
+                                    # Lets the viewer fetch just the cited page (see /api/pdf/documents/.../pages)
+                                    record = file_service.catalog.get(filename)
+                                    citation["page"] = int(page)
+                                    if record:
+                                        citation["version"] = record.digest[:12]
+                                yield json.dumps(citation)
                 last_yield_time = asyncio.get_event_loop().time()
 
             # Heartbeat check (if needed, but astream_events is usually busy)
@@ -0,0 +1,216 @@
+import asyncio
+import tarfile
+import time
+import zipfile
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple
+from backend.core.config import settings
+from backend.services.file_service import file_service
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class BulkLimitError(Exception):
+    """The upload exceeds one of the BULK_MAX_* limits."""
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_filename(path: str) -> Optional[str]:
+    """Flatten an archive member path to the upload filename, or None to skip it.
+
+    Uploads live in one flat directory, so members are stored under their
+    basename. Hidden files and OS metadata (__MACOSX, .DS_Store) are skipped.
+    """
+    parts = [p for p in path.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or any(p.startswith(".") or p == "__MACOSX" for p in parts):
+        return None
+    return parts[-1]
+
+
+def _too_large(name: str, size: int) -> Optional[str]:
+    if size > settings.BULK_MAX_FILE_BYTES:
+        return f"{name} is larger than {settings.BULK_MAX_FILE_BYTES} bytes"
+    return None
+
+
+def _check_total(total: int):
+    if total > settings.BULK_MAX_TOTAL_BYTES:
+        raise BulkLimitError(f"Upload expands to more than {settings.BULK_MAX_TOTAL_BYTES} bytes")
+
+
+def iter_archive(fileobj: BinaryIO, archive_name: str) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """Yield (filename, content, error) for each file in a zip or tar archive.
+
+    Members are read one at a time straight from the upload, never extracted
+    to disk. Zip archives are read through their central directory (the
+    spooled upload is seekable); tar archives are streamed in a single pass
+    ("r|*"), so compressed tarballs are decompressed on the fly. Oversized
+    members are reported with an error instead of being read; exceeding
+    BULK_MAX_TOTAL_BYTES raises BulkLimitError.
+    """
+    total = 0
+    if archive_name.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                name = None if info.is_dir() else member_filename(info.filename)
+                if name is None:
+                    continue
+                error = _too_large(name, info.file_size)
+                if error:
+                    yield name, None, error
+                    continue
+                with archive.open(info) as member:
+                    # Never trust the declared size: read at most one byte past the limit
+                    content = member.read(settings.BULK_MAX_FILE_BYTES + 1)
+                error = _too_large(name, len(content))
+                if error:
+                    yield name, None, error
+                    continue
+                total += len(content)
+                _check_total(total)
+                yield name, content, None
+        return
+
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for info in archive:
+            name = member_filename(info.name) if info.isfile() else None
+            if name is None:
+                continue
+            error = _too_large(name, info.size)
+            if error:
+                yield name, None, error
+                continue
+            total += info.size
+            _check_total(total)
+            yield name, archive.extractfile(info).read(), None
+
+
+async def bulk_ingest(sources: List[Tuple[str, BinaryIO]], upsert: bool = True,
+                      concurrency: Optional[int] = None) -> AsyncIterator[dict]:
+    """Ingest many uploads concurrently, yielding one event per file and a final summary.
+
+    sources are (filename, file object) pairs; archives are expanded member
+    by member. At most `concurrency` files are held in memory and ingested at
+    once. Events:
+        {"type": "file", "filename", "status": "success" | "error", "chunks", "seconds", "error", "done", "total"}
+        {"type": "summary", "total", "succeeded", "failed", "chunks", "seconds"}
+    total in file events is null while an archive is still being read.
+    """
+    concurrency = concurrency or settings.BULK_INGEST_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    events: asyncio.Queue = asyncio.Queue()
+    started = time.perf_counter()
+    counts = {"submitted": 0, "done": 0, "succeeded": 0, "failed": 0, "chunks": 0}
+    total_known = asyncio.Event()
+    tasks = set()
+    seen = set()
+
+    def report(filename: str, error: Optional[str], chunks: int = 0, seconds: float = 0.0):
+        counts["done"] += 1
+        counts["failed" if error else "succeeded"] += 1
+        counts["chunks"] += chunks
+        events.put_nowait({
+            "type": "file", "filename": filename, "status": "error" if error else "success",
+            "chunks": chunks, "seconds": round(seconds, 4), "error": error,
+            "done": counts["done"], "total": counts["submitted"] if total_known.is_set() else None,
+        })
+
+    async def ingest(filename: str, content: bytes):
+        file_started = time.perf_counter()
+        try:
+            if await file_service.ingest_file(content, filename, upsert=upsert):
+                record = file_service.catalog.get(filename)
+                report(filename, None, record.chunk_count if record else 0, time.perf_counter() - file_started)
+            else:
+                report(filename, "Failed to process file", seconds=time.perf_counter() - file_started)
+        except Exception as e:
+            report(filename, str(e), seconds=time.perf_counter() - file_started)
+        finally:
+            semaphore.release()
+
+    def submit(filename: str, content: Optional[bytes], error: Optional[str]):
+        """Start ingesting one file; the caller holds a semaphore slot that the task releases."""
+        counts["submitted"] += 1
+        if counts["submitted"] > settings.BULK_MAX_FILES:
+            counts["submitted"] -= 1
+            semaphore.release()
+            raise BulkLimitError(f"Upload contains more than {settings.BULK_MAX_FILES} files")
+        if not error and filename in seen:
+            error = f"Duplicate filename {filename} in this upload"
+        if error:
+            semaphore.release()
+            report(filename, error)
+            return
+        seen.add(filename)
+        task = asyncio.create_task(ingest(filename, content))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def read_upload(filename: str, fileobj: BinaryIO):
+        # Loose files get the same treatment as archive members: no paths, no ".."
+        name = member_filename(filename or "")
+        if name is None:
+            return filename, None, f"Invalid filename: {filename!r}"
+        filename = name
+        content = fileobj.read(settings.BULK_MAX_FILE_BYTES + 1)
+        error = _too_large(filename, len(content))
+        return (filename, None, error) if error else (filename, content, None)
+
+    async def produce():
+        try:
+            for filename, fileobj in sources:
+                members = iter_archive(fileobj, filename) if is_archive(filename) else None
+                while True:
+                    # Only read the next file once a slot is free, so memory stays bounded.
+                    # Reads run in a worker thread (archive decompression blocks).
+                    await semaphore.acquire()
+                    try:
+                        if members is None:
+                            member = await asyncio.to_thread(read_upload, filename, fileobj)
+                        else:
+                            member = await asyncio.to_thread(next, members, None)
+                    except BulkLimitError:
+                        semaphore.release()
+                        raise
+                    except Exception as e:
+                        submit(filename, None, f"Could not read archive: {e}")
+                        break
+                    if member is None:
+                        semaphore.release()
+                        break
+                    submit(*member)
+                    if members is None:
+                        break
+        except BulkLimitError as e:
+            events.put_nowait({"type": "error", "error": str(e)})
+        total_known.set()
+        if tasks:
+            await asyncio.gather(*list(tasks))
+        events.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+    seconds = time.perf_counter() - started
+    logger.info(f"Bulk ingest: {counts['succeeded']}/{counts['submitted']} files, {counts['chunks']} chunks in {seconds:.2f}s")
+    yield {
+        "type": "summary", "total": counts["submitted"], "succeeded": counts["succeeded"],
+        "failed": counts["failed"], "chunks": counts["chunks"], "seconds": round(seconds, 4),
+    }
@@ -0,0 +1,294 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Approximate token count: whitespace-separated words plus punctuation marks,
+# plus one per CJK character (those scripts are written without spaces and
+# tokenized about per character). Close to (a little under) what WordPiece/BPE
+# tokenizers produce, and much cheaper than running one. Text this misjudges
+# (long unbroken strings) is still bounded by max_chars.
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_RE = re.compile(f"[{_CJK}]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_TOKEN_RE = re.compile(f"[{_CJK}]|\\w+|[^\\w\\s]")
+_HEADING_RE = re.compile(r"#{1,6}\s")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+|[。！？]")
+# JSON strings (skipped as a whole) and the structural characters we track
+_JSON_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|[\[\]{},]')
+
+# Files chunked as code: no markdown headings/fences, oversized blocks split by line
+CODE_EXTENSIONS = (".py", ".js", ".ts", ".tsx", ".css", ".html", ".xml", ".json", ".lock")
+
+
+def count_tokens(text: str) -> int:
+    tokens = len(text.split()) + len(_PUNCT_RE.findall(text))
+    if not text.isascii():
+        tokens += len(_CJK_RE.findall(text))
+    return tokens
+
+
+@dataclass
+class Chunk:
+    text: str
+    # Character offsets of the chunk in its page (or stream): [start, end)
+    start: int
+    end: int
+    tokens: int
+    page: Optional[int] = None
+    # Closest markdown heading above the chunk
+    section: Optional[str] = None
+
+
+class _Block(NamedTuple):
+    start: int
+    end: int
+    text: str
+    tokens: int
+    # Whitespace that separated this piece from the previous one in the same
+    # block (None for the first piece of a block)
+    sep: Optional[str]
+    heading: bool = False
+
+
+def _json_cuts(text: str) -> List[int]:
+    """Cut points after each comma between top-level elements of a JSON array/object."""
+    cuts = []
+    depth = 0
+    for match in _JSON_TOKEN_RE.finditer(text):
+        token = match.group()
+        if token in "[{":
+            depth += 1
+        elif token in "]}":
+            depth -= 1
+        elif token == "," and depth == 1:
+            cuts.append(match.end())
+    return cuts
+
+
+def _sentence_cuts(text: str) -> List[int]:
+    return [match.end() for match in _SENTENCE_END_RE.finditer(text)]
+
+
+def _line_cuts(text: str) -> List[int]:
+    return [match.end() for match in re.finditer("\n", text)]
+
+
+def _pieces(text: str, cuts: List[int]) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """(offset, stripped piece, whitespace before it) for the spans between cut points."""
+    previous_end = None
+    for a, b in zip([0] + cuts, cuts + [len(text)]):
+        raw = text[a:b]
+        piece = raw.strip()
+        if not piece:
+            continue
+        offset = a + len(raw) - len(raw.lstrip())
+        yield offset, piece, None if previous_end is None else text[previous_end:offset]
+        previous_end = offset + len(piece)
+
+
+class StructuredChunker:
+    """Single-pass, structure-aware chunker that can be fed text incrementally.
+
+    Text is scanned line by line into blocks: paragraphs (separated by blank
+    lines), markdown headings and fenced code blocks. Blocks are packed into
+    chunks of about `target_tokens`; a heading always starts a new chunk and
+    stays with the text below it. A block larger than `max_tokens` (or
+    `max_chars`) is cut at the most structural boundary available (top-level
+    JSON elements, then sentences or lines, then words, and as a last resort
+    every max_chars characters) into evenly sized groups, so a long
+    paragraph or page does not leave a runt behind. A chunk still below
+    a third of the target is merged into the previous one of its section
+    when that fits the limits (short chunks otherwise outrank longer,
+    relevant ones on shared boilerplate words).
+
+    feed() yields the chunks completed so far (all but the last, which may
+    still absorb a runt) and close() the rest, so a long text can be chunked
+    as it streams in. Offsets are relative to the start of everything fed to
+    this chunker; blank-line runs between blocks are normalised to a single
+    blank line in the chunk text.
+    """
+
+    def __init__(self, target_tokens: int = 40, max_tokens: Optional[int] = None,
+                 max_chars: Optional[int] = None, code: bool = False, page: Optional[int] = None):
+        self.target_tokens = max(1, target_tokens)
+        self.max_tokens = max(self.target_tokens, max_tokens or self.target_tokens * 3 // 2)
+        # No chunk is longer than this, whatever its estimated token count
+        self.max_chars = max(1, max_chars or self.max_tokens * 7)
+        self.code = code
+        self.page = page
+        self._pending = ""
+        self._offset = 0
+        # Lines of the block being read: (offset, line)
+        self._lines: List[Tuple[int, str]] = []
+        self._fence: Optional[str] = None
+        self._chunk: List[_Block] = []
+        self._tokens = 0
+        self._section: Optional[str] = None
+        self._chunk_section: Optional[str] = None
+        # Last finished chunk, held back in case the next one is a runt
+        self._held: Optional[Chunk] = None
+
+    def feed(self, text: str) -> Iterator[Chunk]:
+        data = self._pending + text
+        complete = data.rfind("\n") + 1
+        self._pending = data[complete:]
+        offset = self._offset
+        for line in data[:complete].split("\n")[:-1]:
+            yield from self._line(line, offset)
+            offset += len(line) + 1
+        self._offset = offset
+
+    def close(self) -> Iterator[Chunk]:
+        if self._pending:
+            yield from self._line(self._pending, self._offset)
+            self._offset += len(self._pending)
+            self._pending = ""
+        yield from self._end_block()
+        yield from self._flush()
+        if self._held is not None:
+            yield self._held
+            self._held = None
+
+    def _line(self, line: str, offset: int) -> Iterator[Chunk]:
+        stripped = line.strip()
+        if self._fence:
+            self._lines.append((offset, line))
+            if stripped.startswith(self._fence):
+                self._fence = None
+                yield from self._end_block(code=True)
+            return
+        if not stripped:
+            yield from self._end_block()
+            return
+        if not self.code:
+            if stripped.startswith(("```", "~~~")):
+                yield from self._end_block()
+                self._fence = stripped[:3]
+                self._lines.append((offset, line))
+                return
+            if _HEADING_RE.match(stripped):
+                yield from self._end_block()
+                yield from self._flush()
+                self._section = stripped.lstrip("#").strip()
+                self._lines.append((offset, line))
+                yield from self._end_block(heading=True)
+                return
+        self._lines.append((offset, line))
+
+    def _end_block(self, code: bool = False, heading: bool = False) -> Iterator[Chunk]:
+        if not self._lines:
+            return
+        start = self._lines[0][0]
+        text = "\n".join(line for _, line in self._lines).rstrip()
+        self._lines = []
+        if self._fence:
+            # Unterminated fence at the end of the input
+            self._fence = None
+            code = True
+        if len(text) <= self.max_chars:
+            tokens = count_tokens(text)
+            if tokens <= self.max_tokens:
+                yield from self._add(_Block(start, start + len(text), text, tokens, None, heading))
+                return
+        strategies = [_json_cuts] if text[:1] in "[{" else []
+        strategies += [_line_cuts] if code or self.code else [_sentence_cuts, _line_cuts]
+        strategies += [self._word_cuts, self._char_cuts]
+        for block in self._balance(list(self._split(text, start, None, strategies))):
+            yield from self._add(block)
+
+    def _word_cuts(self, text: str) -> List[int]:
+        return [match.start() for i, match in enumerate(_TOKEN_RE.finditer(text))
+                if i and i % self.target_tokens == 0]
+
+    def _char_cuts(self, text: str) -> List[int]:
+        return list(range(self.max_chars, len(text), self.max_chars))
+
+    def _split(self, text: str, start: int, sep: Optional[str],
+               strategies: List[Callable[[str], List[int]]]) -> Iterator[_Block]:
+        cuts, rest = strategies[0], strategies[1:]
+        for offset, piece, piece_sep in _pieces(text, cuts(text)):
+            piece_sep = sep if piece_sep is None else piece_sep
+            tokens = count_tokens(piece)
+            if (tokens > self.max_tokens or len(piece) > self.max_chars) and rest:
+                yield from self._split(piece, start + offset, piece_sep, rest)
+            else:
+                yield _Block(start + offset, start + offset + len(piece), piece, tokens, piece_sep)
+
+    def _balance(self, pieces: List[_Block]) -> Iterator[_Block]:
+        """Group consecutive pieces of one block into ceil(tokens / target) groups of even size."""
+        total = sum(p.tokens for p in pieces)
+        goal = total / math.ceil(total / self.target_tokens)
+        group: List[_Block] = []
+        tokens = 0
+        for piece in pieces:
+            # Close the group at whichever boundary is closer to the goal
+            if group and (tokens + piece.tokens > self.max_tokens
+                          or piece.end - group[0].start > self.max_chars
+                          or tokens + piece.tokens - goal > goal - tokens):
+                yield self._join(group, tokens)
+                group, tokens = [], 0
+            group.append(piece)
+            tokens += piece.tokens
+        if group:
+            yield self._join(group, tokens)
+
+    @staticmethod
+    def _join(pieces: List[_Block], tokens: int) -> _Block:
+        text = pieces[0].text + "".join(p.sep + p.text for p in pieces[1:])
+        return _Block(pieces[0].start, pieces[-1].end, text, tokens, pieces[0].sep)
+
+    def _add(self, block: _Block) -> Iterator[Chunk]:
+        if self._chunk and block.end - self._chunk[0].start > self.max_chars:
+            yield from self._flush()
+        elif self._chunk and self._tokens + block.tokens > self.target_tokens:
+            # Keep a heading with the start of its section unless that overflows max_tokens
+            headings_only = all(b.heading for b in self._chunk)
+            if not headings_only or self._tokens + block.tokens > self.max_tokens:
+                yield from self._flush()
+        if not self._chunk:
+            self._chunk_section = self._section
+        self._chunk.append(block)
+        self._tokens += block.tokens
+
+    def _flush(self) -> Iterator[Chunk]:
+        if not self._chunk:
+            return
+        blocks, self._chunk = self._chunk, []
+        tokens, self._tokens = self._tokens, 0
+        parts = [blocks[0].text]
+        for previous, block in zip(blocks, blocks[1:]):
+            if block.sep is not None:
+                parts.append(block.sep)
+            else:
+                parts.append("\n" if block.start - previous.end <= 1 else "\n\n")
+            parts.append(block.text)
+        chunk = Chunk("".join(parts), blocks[0].start, blocks[-1].end, tokens, self.page, self._chunk_section)
+        held = self._held
+        if (held is not None and tokens < self.target_tokens // 3 and not blocks[0].heading
+                and held.section == chunk.section and held.tokens + tokens <= self.max_tokens
+                and chunk.end - held.start <= self.max_chars):
+            if blocks[0].sep is not None:
+                sep = blocks[0].sep
+            else:
+                sep = "\n" if chunk.start - held.end <= 1 else "\n\n"
+            self._held = Chunk(held.text + sep + chunk.text, held.start, chunk.end, held.tokens + tokens,
+                               self.page, held.section)
+            return
+        self._held = chunk
+        if held is not None:
+            yield held
+
+
+def iter_chunks(pieces: Iterable[str], **options) -> Iterator[Chunk]:
+    """Chunk a stream of text pieces (see StructuredChunker for the options)."""
+    chunker = StructuredChunker(**options)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.close()
+
+
+def chunk_pages(pages: Iterable[Tuple[Optional[int], str]], **options) -> Iterator[Chunk]:
+    """Chunk (page number, text) pairs page by page; chunks never span pages."""
+    for page, text in pages:
+        yield from iter_chunks([text], page=page, **options)
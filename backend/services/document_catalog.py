@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict, fields
+from typing import Dict, List, Optional
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+CATALOG_VERSION = 1
+# Changes are written to disk by a background thread at most this often (seconds)
+SAVE_INTERVAL = 1.0
+
+
+@dataclass
+class DocumentRecord:
+    filename: str
+    digest: str
+    size: int
+    content_type: str
+    page_count: Optional[int] = None
+    chunk_ids: List[str] = field(default_factory=list)
+    ingested_at: float = 0.0
+    ingest_seconds: float = 0.0
+    # Per-stage ingest timings in seconds (extract, chunk, index)
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    # Deferred OCR of images / text-less PDF pages: None, "pending", "done" or "failed"
+    ocr_status: Optional[str] = None
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.chunk_ids)
+
+    def summary(self) -> dict:
+        """Public view of the record (chunk ids are internal bookkeeping)."""
+        data = asdict(self)
+        del data["chunk_ids"]
+        data["chunk_count"] = self.chunk_count
+        return data
+
+
+_RECORD_FIELDS = [f.name for f in fields(DocumentRecord)]
+
+
+class DocumentCatalog:
+    """Registry of ingested documents, keyed by filename.
+
+    Lookups, listing and deletion work off this in-memory map instead of
+    scanning the uploads directory or the whole vector store collection.
+    The catalog is persisted as a single compact JSON file and loaded once
+    at startup. Rewriting that file takes a while for a large catalog, so
+    put/remove/clear only update the map and a background thread saves the
+    changes every save_interval seconds; close() (or flush()) writes what
+    is still pending.
+    """
+
+    def __init__(self, path: str, save_interval: float = SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self._docs: Dict[str, DocumentRecord] = {}
+        self._lock = threading.RLock()
+        # Serialises writers of the file (the saver thread, flush and close)
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._saver: Optional[threading.Thread] = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Rows are stored positionally (see save) to keep the file small
+            columns = data.get("columns", _RECORD_FIELDS)
+            docs = {}
+            for row in data.get("documents", []):
+                values = dict(zip(columns, row))
+                record = DocumentRecord(**{k: v for k, v in values.items() if k in _RECORD_FIELDS})
+                docs[record.filename] = record
+            with self._lock:
+                self._docs = docs
+            logger.info(f"Loaded document catalog with {len(docs)} documents")
+        except Exception as e:
+            logger.error(f"Could not load document catalog {self.path}: {e}")
+
+    def save(self):
+        with self._save_lock:
+            # Only the snapshot needs the lock; serialising and writing happen
+            # outside it (records are replaced by put, never edited in place)
+            with self._lock:
+                rows = [[getattr(r, name) for name in _RECORD_FIELDS] for r in self._docs.values()]
+                self._dirty = False
+            payload = {"version": CATALOG_VERSION, "columns": _RECORD_FIELDS, "documents": rows}
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception:
+                self._dirty = True
+                raise
+
+    def flush(self):
+        """Write pending changes now."""
+        if self._dirty:
+            self.save()
+
+    def close(self):
+        """Stop the background saver and write pending changes."""
+        self._stop.set()
+        self._wake.set()
+        if self._saver is not None:
+            self._saver.join()
+        self.flush()
+
+    def _changed(self):
+        # Called with the lock held: mark the catalog dirty and let the saver write it
+        self._dirty = True
+        if self._saver is None and not self._stop.is_set():
+            self._saver = threading.Thread(target=self._save_loop, name="catalog-saver", daemon=True)
+            self._saver.start()
+        self._wake.set()
+
+    def _save_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            # Coalesce the changes of the next interval into one write
+            self._stop.wait(self.save_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Could not save document catalog {self.path}: {e}")
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Hold to read-modify-write a record atomically."""
+        return self._lock
+
+    def get(self, filename: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            return self._docs.get(filename)
+
+    def put(self, record: DocumentRecord):
+        with self._lock:
+            self._docs[record.filename] = record
+            self._changed()
+
+    def remove(self, filename: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            record = self._docs.pop(filename, None)
+            if record is not None:
+                self._changed()
+            return record
+
+    def clear(self) -> List[DocumentRecord]:
+        with self._lock:
+            records = list(self._docs.values())
+            self._docs = {}
+            self._changed()
+            return records
+
+    def list(self) -> List[DocumentRecord]:
+        with self._lock:
+            records = list(self._docs.values())
+        return sorted(records, key=lambda r: r.ingested_at)
+
+    def expired(self, max_age_seconds: float, now: Optional[float] = None) -> List[DocumentRecord]:
+        cutoff = (now if now is not None else time.time()) - max_age_seconds
+        with self._lock:
+            return [r for r in self._docs.values() if r.ingested_at <= cutoff]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
+
+    def __contains__(self, filename: str):
+        with self._lock:
+            return filename in self._docs
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from backend.core.config import settings
+
+WORDS = (
+    "the document describes a system for searching uploaded files and answering questions "
+    "with citations retrieval augmented generation vector store embeddings chunks pages "
+    "results indicate that latency throughput and accuracy depend on the corpus size"
+).split()
+
+TOOL_PATTERNS = ("none", "search", "list", "mixed")
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Scripted streaming chat model for offline load tests (see ChatService for the UI simulator).
+
+    Replies are deterministic for a given prompt. Each turn either answers
+    directly or first calls a tool, depending on tool_pattern:
+        none    always answer directly
+        search  call search_documents, then answer
+        list    call list_documents, then answer
+        mixed   pick per prompt (roughly half direct, the rest split between tools)
+    Timing is controlled by first_token_latency (seconds before the first
+    chunk) and tokens_per_second (0 streams as fast as possible).
+    """
+
+    tokens_per_second: float = 50.0
+    first_token_latency: float = 0.2
+    response_tokens: int = 60
+    tool_pattern: str = "none"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas are irrelevant to the script; calls are made by name
+        return self
+
+    def _plan(self, messages: List[BaseMessage]):
+        """Return (tool_name or None, prompt text) for the next turn."""
+        last = messages[-1]
+        prompt = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if isinstance(last, ToolMessage) or self.tool_pattern == "none":
+            return None, prompt
+        if self.tool_pattern == "search":
+            return "search_documents", prompt
+        if self.tool_pattern == "list":
+            return "list_documents", prompt
+        bucket = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16) % 4
+        return {0: "search_documents", 1: "list_documents"}.get(bucket), prompt
+
+    def _tokens(self, prompt: str) -> List[str]:
+        seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+        return [("" if i == 0 else " ") + WORDS[(seed + i * 7) % len(WORDS)] for i in range(self.response_tokens)]
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], output_tokens: int) -> dict:
+        """Whitespace token counts, so token metrics have something to report."""
+        input_tokens = sum(len(str(m.content).split()) for m in messages)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _tool_call(self, tool_name: str, prompt: str) -> dict:
+        args = {"query": prompt} if tool_name == "search_documents" else {}
+        return {"name": tool_name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        tool_name, prompt = self._plan(messages)
+        time.sleep(self.first_token_latency)
+        if tool_name:
+            message = AIMessage(content="", tool_calls=[self._tool_call(tool_name, prompt)])
+        else:
+            message = AIMessage(content="".join(self._tokens(prompt)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, tool_call_chunks=self._chunks(message)))
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> list:
+        return [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+            for i, call in enumerate(message.tool_calls)
+        ]
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tool_name, prompt = self._plan(messages)
+        await asyncio.sleep(self.first_token_latency)
+        if tool_name:
+            message = AIMessage(content="", tool_calls=[self._tool_call(tool_name, prompt)])
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=self._chunks(message),
+                                                             usage_metadata=self._usage(messages, 1)))
+            return
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        tokens = self._tokens(prompt)
+        for i, token in enumerate(tokens):
+            if i and delay:
+                await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, len(tokens))))
+
+
+def fake_model_from_settings() -> FakeStreamingChatModel:
+    if settings.FAKE_LLM_TOOL_PATTERN not in TOOL_PATTERNS:
+        raise ValueError(f"FAKE_LLM_TOOL_PATTERN must be one of {TOOL_PATTERNS}")
+    return FakeStreamingChatModel(
+        tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+        first_token_latency=settings.FAKE_LLM_FIRST_TOKEN_LATENCY,
+        response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+        tool_pattern=settings.FAKE_LLM_TOOL_PATTERN,
+    )
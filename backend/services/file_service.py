@@ -1,13 +1,18 @@
+import atexit
 import os
-from typing import List
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
-from langchain_chroma import Chroma
-from PIL import Image
+import time
+import hashlib
+import threading
+from typing import List, Optional
 import io
+import asyncio
 import pdfplumber
 import docx
 from backend.core.config import settings
+from backend.core import telemetry
+from backend.services.chunker import CODE_EXTENSIONS, chunk_pages
+from backend.services.document_catalog import DocumentCatalog, DocumentRecord
+from backend.services.index_writer import IndexWriter
 import logging
 
 # Setup logger
@@ -16,87 +21,177 @@ logger = logging.getLogger("uvicorn.error")
 MAX_TEXT_CHARS = 30000 # Increased limit
 
 class FileService:
-    def __init__(self):
-        logger.info("Initializing FileService with FastEmbed (CPU-optimized)")
-        self.embeddings = FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-        self.vector_store = Chroma(
+    def __init__(self, upload_dir: str = "backend/uploads", catalog_path: Optional[str] = None):
+        # The embedding model and vector store are created on first use (or by
+        # warmup()) so importing the app does not load ONNX/Chroma.
+        self._embeddings = None
+        self._vector_store = None
+        self._warm = False
+        self._init_lock = threading.RLock()
+        self.upload_dir = upload_dir
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.catalog = DocumentCatalog(catalog_path or settings.CATALOG_PATH)
+        # All vector store writes go through one write-behind queue
+        self.index_writer = IndexWriter(
+            lambda: self.vector_store,
+            batch_size=settings.INDEX_BATCH_SIZE,
+            flush_interval=settings.INDEX_FLUSH_INTERVAL_MS / 1000
+        )
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._init_lock:
+                if self._embeddings is None and settings.EMBEDDING_PROVIDER == "fake":
+                    from langchain_core.embeddings import DeterministicFakeEmbedding
+                    logger.info("Initializing FileService with deterministic fake embeddings")
+                    self._embeddings = DeterministicFakeEmbedding(size=384)
+                if self._embeddings is None:
+                    from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+                    logger.info("Initializing FileService with FastEmbed (CPU-optimized)")
+                    self._embeddings = FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5")
+        return self._embeddings
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            with self._init_lock:
+                if self._vector_store is None:
+                    self._vector_store = self._create_vector_store()
+        return self._vector_store
+
+    def warmup(self):
+        """Load the embedding model with a dummy batch and open the vector store."""
+        started = time.perf_counter()
+        self.embeddings.embed_documents(["warmup"])
+        self.vector_store
+        self._warm = True
+        logger.info(f"FileService warm in {time.perf_counter() - started:.2f}s")
+
+    def status(self) -> dict:
+        return {
+            "embeddings": self._embeddings is not None,
+            "vector_store": self._vector_store is not None,
+            "catalog": True,
+            "warm": self._warm,
+        }
+
+    def _create_vector_store(self):
+        if settings.VECTOR_BACKEND == "numpy":
+            from backend.services.vector_index import NumpyVectorStore
+            logger.info(f"Using NumPy vector index at {settings.VECTOR_INDEX_DIR} ({settings.VECTOR_INDEX_DTYPE})")
+            return NumpyVectorStore(
+                persist_directory=settings.VECTOR_INDEX_DIR,
+                embedding_function=self.embeddings,
+                dtype=settings.VECTOR_INDEX_DTYPE,
+                rescore=settings.VECTOR_INDEX_RESCORE,
+                resident=settings.VECTOR_INDEX_RESIDENT
+            )
+        from langchain_chroma import Chroma
+        return Chroma(
             persist_directory=settings.CHROMA_PERSIST_DIR,
             embedding_function=self.embeddings
         )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.EMBED_CHUNK_SIZE,
-            chunk_overlap=50
-        )
-        self.upload_dir = "backend/uploads"
-        os.makedirs(self.upload_dir, exist_ok=True)
 
-    async def ingest_file(self, file_content: bytes, filename: str):
-        """Ingest a file (PDF, Text, Code, Image, Docx) into the vector store."""
+    async def ingest_file(self, file_content: bytes, filename: str, upsert: bool = True):
+        """Ingest a file (PDF, Text, Code, Image, Docx) into the vector store.
+
+        With upsert (the default) a re-uploaded document is diffed chunk by chunk
+        against the catalogued version: only new or changed chunks are embedded
+        and chunks that no longer exist are deleted. upsert=False re-embeds the
+        whole document. Raises ValueError for a filename that is not a plain
+        file name (e.g. one with path separators or "..").
+        """
+        self.check_filename(filename)
+        with self.index_writer.producer():
+            return await self._ingest_file(file_content, filename, upsert)
+
+    @staticmethod
+    def check_filename(filename: str):
+        """Uploads are stored flat in upload_dir: reject names that would resolve elsewhere."""
+        if (not filename or filename in (".", "..") or "\x00" in filename
+                or os.path.basename(filename.replace("\\", "/")) != filename):
+            raise ValueError(f"Invalid filename: {filename!r}")
+
+    async def _ingest_file(self, file_content: bytes, filename: str, upsert: bool):
         logger.info(f"Ingesting file: {filename}")
+        started = time.perf_counter()
         # Save file to disk for static serving
         file_path = os.path.join(self.upload_dir, filename)
         with open(file_path, "wb") as f:
             f.write(file_content)
             
         ext = os.path.splitext(filename)[1].lower()
+        record = DocumentRecord(
+            filename=filename,
+            digest=hashlib.sha256(file_content).hexdigest(),
+            size=len(file_content),
+            content_type=ext.lstrip(".") or "unknown",
+        )
+
+        previous = self.catalog.get(filename)
+        if upsert and previous and previous.digest == record.digest:
+            logger.info(f"{filename} is unchanged since last ingest. Skipping re-index.")
+            record.page_count = previous.page_count
+            record.chunk_ids = previous.chunk_ids
+            record.ocr_status = previous.ocr_status
+            await self._register(record, started)
+            return file_path
         
         try:
-            from langchain_core.documents import Document
-            text = ""
-            
-            if ext == ".pdf":
-                with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                logger.info(f"Extracted {len(text)} characters from PDF {filename}")
-                    
-            elif ext == ".docx":
-                doc = docx.Document(io.BytesIO(file_content))
-                text = "\n".join([para.text for para in doc.paragraphs])
-                logger.info(f"Extracted {len(text)} characters from DOCX {filename}")
-                
-            elif ext in [".txt", ".md", ".py", ".js", ".ts", ".tsx", ".html", ".css", ".json", ".lock", ".xml"]:
-                try:
-                    text = file_content.decode("utf-8")
-                except UnicodeDecodeError:
-                    text = file_content.decode("utf-8", errors="ignore")
-                logger.info(f"Decoded {len(text)} characters from text file {filename}")
-                
-            elif ext in [".png", ".jpg", ".jpeg", ".webp"]:
-                # For images, we don't extract text for now (slowness fix)
-                logger.info(f"Image file {filename} saved. Skipping text extraction.")
+            stage_started = time.perf_counter()
+            # Extraction and chunking are CPU-bound; keep them off the event loop
+            pages, record.page_count = await asyncio.to_thread(self.extract_pages, file_content, filename)
+            record.stage_seconds["extract"] = round(time.perf_counter() - stage_started, 4)
+            ocr_pages = self._ocr_targets(ext, pages, record.page_count)
+            if ocr_pages is not None:
+                record.ocr_status = "pending"
+            if pages is None:
+                await self._register(record, started, ocr_pages)
                 return file_path
-            else:
-                # Default to text decoding if it looks like text
-                try:
-                    text = file_content.decode("utf-8")
-                    logger.info(f"Decoded {len(text)} characters from unknown file type {filename}")
-                except UnicodeDecodeError:
-                    logger.warning(f"File {filename} appears to be binary. Skipping ingestion.")
-                    return file_path
                 
-            if not text.strip() or len(text.strip()) < 5:
+            text_length = sum(len(t.strip()) for _, t in pages)
+            if text_length < 5:
                 logger.warning(f"Extracted text from {filename} is too short or empty. Skipping vector store.")
+                await self._register(record, started, ocr_pages)
                 return file_path
 
-            # Truncate text if it's too long
-            if len(text) > MAX_TEXT_CHARS:
-                text = text[:MAX_TEXT_CHARS] + "\n\n[Note: Document truncated]"
-
-            documents = [Document(page_content=text, metadata={"source": filename})]
-            texts = self.text_splitter.split_documents(documents)
+            stage_started = time.perf_counter()
+            texts = await asyncio.to_thread(self.split_pages, filename, pages)
+            record.chunk_ids = self._chunk_ids(filename, texts)
+            record.stage_seconds["chunk"] = round(time.perf_counter() - stage_started, 4)
             
+            stage_started = time.perf_counter()
             if texts:
-                logger.info(f"Adding {len(texts)} chunks to vector store for {filename}")
-                # Log first chunk to verify
-                logger.info(f"Sample chunk: {texts[0].page_content[:100]}...")
-                self.vector_store.add_documents(texts)
+                known_ids = set(previous.chunk_ids) if (upsert and previous) else set()
+                new_texts = []
+                new_ids = []
+                kept = []
+                for chunk, chunk_id in zip(texts, record.chunk_ids):
+                    if chunk_id not in known_ids:
+                        new_texts.append(chunk)
+                        new_ids.append(chunk_id)
+                    else:
+                        kept.append((chunk, chunk_id))
+                if kept:
+                    # An edit earlier in the document shifts the offsets (and maybe
+                    # the section) of unchanged chunks: refresh their metadata
+                    moved = await asyncio.to_thread(self._moved_chunks, kept)
+                    if moved:
+                        logger.info(f"Updating metadata of {len(moved)} moved chunks of {filename}")
+                        await self.index_writer.aupdate([c for c, _ in moved], [i for _, i in moved])
+                logger.info(f"Adding {len(new_texts)} of {len(texts)} chunks to vector store for {filename}")
+                if new_texts:
+                    # Log first chunk to verify
+                    logger.debug("Sample chunk: %s...", new_texts[0].page_content[:100])
+                    # Resolves once the writer has committed these chunks (read-after-write)
+                    await self.index_writer.aadd(new_texts, new_ids)
                 logger.info(f"Successfully added {filename} to vector store.")
             else:
                 logger.warning(f"No text chunks generated for {filename}.")
+            record.stage_seconds["index"] = round(time.perf_counter() - stage_started, 4)
             
+            await self._register(record, started, ocr_pages)
             return file_path
         except Exception as e:
             logger.error(f"Error ingesting file {filename}: {e}")
@@ -104,23 +199,209 @@ class FileService:
             traceback.print_exc()
             return None
 
+    def extract_pages(self, file_content: bytes, filename: str):
+        """Extract text as (page number, text) pairs; page is None for formats without pages.
+
+        Returns (pages, page_count). pages is None for files that are stored
+        but not indexed (images, binary files).
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        pages = []
+        page_count = None
+        
+        if ext == ".pdf":
+            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+                page_count = len(pdf.pages)
+                for page_number, page in enumerate(pdf.pages, start=1):
+                    page_text = page.extract_text()
+                    if page_text:
+                        pages.append((page_number, page_text + "\n"))
+            logger.info(f"Extracted {sum(len(t) for _, t in pages)} characters from PDF {filename}")
+                
+        elif ext == ".docx":
+            doc = docx.Document(io.BytesIO(file_content))
+            text = "\n".join([para.text for para in doc.paragraphs])
+            pages.append((None, text))
+            logger.info(f"Extracted {len(text)} characters from DOCX {filename}")
+            
+        elif ext in [".txt", ".md", ".py", ".js", ".ts", ".tsx", ".html", ".css", ".json", ".lock", ".xml"]:
+            try:
+                text = file_content.decode("utf-8")
+            except UnicodeDecodeError:
+                text = file_content.decode("utf-8", errors="ignore")
+            pages.append((None, text))
+            logger.info(f"Decoded {len(text)} characters from text file {filename}")
+            
+        elif ext in [".png", ".jpg", ".jpeg", ".webp"]:
+            # Images are OCR'd later by the background queue (see ocr_service)
+            logger.info(f"Image file {filename} saved. Text extraction deferred to OCR.")
+            return None, page_count
+        else:
+            # Default to text decoding if it looks like text
+            try:
+                text = file_content.decode("utf-8")
+                pages.append((None, text))
+                logger.info(f"Decoded {len(text)} characters from unknown file type {filename}")
+            except UnicodeDecodeError:
+                logger.warning(f"File {filename} appears to be binary. Skipping ingestion.")
+                return None, page_count
+        return pages, page_count
+
+    def split_pages(self, filename: str, pages) -> list:
+        """Truncate to MAX_TEXT_CHARS and chunk into Documents carrying source/page/offset metadata."""
+        from langchain_core.documents import Document
+        truncated = []
+        remaining = MAX_TEXT_CHARS
+        for page_number, text in pages:
+            if remaining <= 0:
+                break
+            if len(text) > remaining:
+                text = text[:remaining] + "\n\n[Note: Document truncated]"
+            remaining -= len(text)
+            truncated.append((page_number, text))
+
+        # Chunk page by page so an edit on one page leaves other pages' chunks untouched
+        documents = []
+        chunks = chunk_pages(
+            truncated,
+            target_tokens=settings.CHUNK_TARGET_TOKENS,
+            max_tokens=settings.CHUNK_MAX_TOKENS,
+            max_chars=settings.CHUNK_MAX_CHARS,
+            code=os.path.splitext(filename)[1].lower() in CODE_EXTENSIONS
+        )
+        for chunk in chunks:
+            metadata = {"source": filename, "start_index": chunk.start, "end_index": chunk.end}
+            if chunk.page is not None:
+                metadata["page"] = chunk.page
+            if chunk.section:
+                metadata["section"] = chunk.section
+            documents.append(Document(page_content=chunk.text, metadata=metadata))
+        return documents
+
+    @staticmethod
+    def _chunk_ids(filename: str, chunks) -> List[str]:
+        """Content-addressed chunk ids: an unchanged chunk keeps its id across re-uploads."""
+        prefix = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:12]
+        ids = []
+        seen = {}
+        for chunk in chunks:
+            key = f"{chunk.metadata.get('page', '')}\x00{chunk.page_content}"
+            chunk_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+            # Identical chunks within one document get an occurrence suffix
+            occurrence = seen.get(chunk_hash, 0)
+            seen[chunk_hash] = occurrence + 1
+            ids.append(f"{prefix}-{chunk_hash}" + (f"-{occurrence}" if occurrence else ""))
+        return ids
+
+    def _moved_chunks(self, kept):
+        """(chunk, id) pairs whose stored metadata differs from the re-chunked version."""
+        stored = {doc.id: doc.metadata for doc in self.vector_store.get_by_ids([i for _, i in kept])}
+        return [(chunk, chunk_id) for chunk, chunk_id in kept if stored.get(chunk_id, chunk.metadata) != chunk.metadata]
+
+    @staticmethod
+    def _ocr_targets(ext: str, pages, page_count):
+        """What to OCR after ingest: [None] for an image, the text-less PDF pages, or None for nothing."""
+        from backend.services.ocr_service import IMAGE_EXTENSIONS, ocr_queue
+        if not ocr_queue.enabled:
+            return None
+        if ext in IMAGE_EXTENSIONS:
+            return [None]
+        if ext == ".pdf" and page_count:
+            with_text = {page for page, text in pages or [] if text.strip()}
+            missing = [page for page in range(1, page_count + 1) if page not in with_text]
+            return missing or None
+        return None
+
+    async def _register(self, record: DocumentRecord, started: float, ocr_pages=None):
+        """Record a finished ingest in the catalog, dropping chunks the new version no longer has.
+
+        ocr_pages (see _ocr_targets) queues deferred OCR once the record is saved.
+        """
+        previous = self.catalog.get(record.filename)
+        if previous and previous.chunk_ids:
+            current = set(record.chunk_ids)
+            stale_ids = [chunk_id for chunk_id in previous.chunk_ids if chunk_id not in current]
+            if stale_ids:
+                await self.index_writer.adelete(stale_ids)
+                logger.info(f"Deleted {len(stale_ids)} stale chunks of {record.filename}.")
+        record.ingested_at = time.time()
+        record.ingest_seconds = round(time.perf_counter() - started, 4)
+        for stage, seconds in record.stage_seconds.items():
+            telemetry.INGEST_STAGE.labels(stage=stage).observe(seconds)
+        self.catalog.put(record)
+        if ocr_pages is not None:
+            from backend.services.ocr_service import ocr_queue
+            ocr_queue.submit(record.filename, record.digest, None if ocr_pages == [None] else ocr_pages)
+
+    def list_documents(self) -> List[DocumentRecord]:
+        return self.catalog.list()
+
+    def delete_document(self, filename: str) -> bool:
+        """Remove a single document's chunks, file and catalog entry."""
+        record = self.catalog.remove(filename)
+        if record is None:
+            return False
+        if record.chunk_ids:
+            # Queued behind any pending writes, so an in-flight upload cannot resurrect them
+            self.index_writer.delete(record.chunk_ids).result()
+        file_path = os.path.join(self.upload_dir, filename)
+        try:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            logger.warning(f"Could not remove file {file_path}: {e}")
+        logger.info(f"Deleted document {filename} ({record.chunk_count} chunks).")
+        return True
+
+    def expire_documents(self, max_age_seconds: float) -> int:
+        """Delete documents ingested more than max_age_seconds ago."""
+        expired = self.catalog.expired(max_age_seconds)
+        for record in expired:
+            self.delete_document(record.filename)
+        if expired:
+            logger.info(f"Expired {len(expired)} documents.")
+        return len(expired)
+
     def get_retriever(self):
         # Always return a fresh retriever from the current vector store
         return self.vector_store.as_retriever(search_kwargs={"k": 10})
 
+    async def asearch(self, query: str, k: int = 10):
+        """Top-k chunks for a query, timing query embedding and the index search separately."""
+        # The first use loads the model / opens the store (or waits on a warmup
+        # holding _init_lock): do that off the event loop
+        embeddings = self._embeddings or await asyncio.to_thread(lambda: self.embeddings)
+        with telemetry.span("retrieval.embed_query", telemetry.RETRIEVAL_STAGE, {"stage": "embed_query"}):
+            vector = await embeddings.aembed_query(query)
+        with telemetry.span("retrieval.search", telemetry.RETRIEVAL_STAGE, {"stage": "search"}, k=k):
+            return await asyncio.to_thread(lambda: self.vector_store.similarity_search_by_vector(vector, k))
+
+    def _stored_ids(self) -> List[str]:
+        from backend.services.vector_index import NumpyVectorStore
+        store = self.vector_store
+        if isinstance(store, NumpyVectorStore):
+            return store.ids()
+        return store.get(include=[])["ids"]
+
     def reset_vector_store(self):
         """Clears the vector store safely by deleting all documents."""
         logger.info("Resetting vector store...")
         try:
-            # Delete all documents in the collection
-            all_docs = self.vector_store.get()
-            if all_docs and all_docs['ids']:
-                self.vector_store.delete(ids=all_docs['ids'])
-                logger.info(f"Deleted {len(all_docs['ids'])} documents from vector store.")
+            self.catalog.clear()
+            # Delete every chunk in the collection, not just the catalogued ones:
+            # chunks written before the catalog existed or by a failed ingest
+            # are not listed in it
+            self.index_writer.flush().result()
+            chunk_ids = self._stored_ids()
+            if chunk_ids:
+                self.index_writer.delete(chunk_ids).result()
+                logger.info(f"Deleted {len(chunk_ids)} chunks from vector store.")
             
             # Also clear uploads directory
             if os.path.exists(self.upload_dir):
                 for f in os.listdir(self.upload_dir):
+                    if f == ".gitkeep":
+                        continue
                     file_path = os.path.join(self.upload_dir, f)
                     try:
                         if os.path.isfile(file_path):
@@ -134,12 +415,11 @@ class FileService:
             logger.error(f"Error resetting vector store: {e}")
             # Fallback: try to re-initialize
             try:
-                self.vector_store = Chroma(
-                    persist_directory=settings.CHROMA_PERSIST_DIR,
-                    embedding_function=self.embeddings
-                )
+                self._vector_store = self._create_vector_store()
                 return True
             except:
                 return False
 
 file_service = FileService()
+# Scripts use the service without the app's lifespan: write the catalog on exit too
+atexit.register(file_service.catalog.close)
@@ -0,0 +1,206 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, List, Optional
+from backend.core import telemetry
+import logging
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+_STOP = object()
+
+
+class _Op:
+    __slots__ = ("kind", "ids", "documents", "future")
+
+    def __init__(self, kind: str, ids: List[str], documents: Optional[List["Document"]] = None):
+        self.kind = kind  # "add" | "update" | "delete" | "barrier"
+        self.ids = ids
+        self.documents = documents
+        self.future = Future()
+
+
+class IndexWriter:
+    """Single background writer for the vector store (write-behind queue).
+
+    Ingests hand their chunks to add()/aadd() instead of writing directly.
+    The writer thread drains the queue in arrival order, coalescing
+    consecutive adds from concurrent ingests into one add_documents call of
+    up to batch_size chunks (one embedding batch and one store commit),
+    waiting at most flush_interval seconds for more work to arrive. The wait
+    only happens while other producers (see producer()) are still running,
+    so a lone upload is committed immediately.
+    Deletes and metadata updates are applied in queue order, so they never
+    overtake an earlier add. Each caller gets a future that resolves once its chunks are
+    committed, which is when the upload is reported as searchable.
+    """
+
+    def __init__(self, store_getter: Callable, batch_size: int = 512, flush_interval: float = 0.02):
+        self._store_getter = store_getter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._producers = 0
+        self.stats = {"flushes": 0, "chunks": 0, "requests": 0}
+
+    @contextmanager
+    def producer(self):
+        """Mark an ingest in progress; the writer waits for in-progress ingests to batch them together."""
+        with self._lock:
+            self._producers += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._producers -= 1
+
+    def _submit(self, op: _Op) -> Future:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="index-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(op)
+        return op.future
+
+    def add(self, documents: List["Document"], ids: List[str]) -> Future:
+        return self._submit(_Op("add", list(ids), list(documents)))
+
+    def update(self, documents: List["Document"], ids: List[str]) -> Future:
+        """Replace the metadata of stored chunks (their text and vectors are unchanged)."""
+        return self._submit(_Op("update", list(ids), list(documents)))
+
+    def delete(self, ids: List[str]) -> Future:
+        return self._submit(_Op("delete", list(ids)))
+
+    def flush(self) -> Future:
+        """Future that resolves once everything queued before it is committed."""
+        return self._submit(_Op("barrier", []))
+
+    async def aadd(self, documents: List["Document"], ids: List[str]):
+        return await asyncio.wrap_future(self.add(documents, ids))
+
+    async def aupdate(self, documents: List["Document"], ids: List[str]):
+        return await asyncio.wrap_future(self.update(documents, ids))
+
+    async def adelete(self, ids: List[str]):
+        return await asyncio.wrap_future(self.delete(ids))
+
+    def close(self, timeout: Optional[float] = None):
+        """Commit queued work and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _run(self):
+        carry = None
+        while True:
+            op = carry if carry is not None else self._queue.get()
+            carry = None
+            if op is _STOP:
+                return
+            batch = [op]
+            if op.kind == "add":
+                carry = self._coalesce(batch)
+            try:
+                self._execute(batch)
+            except Exception as e:
+                # _execute resolves futures itself; this only guards the thread
+                logger.error(f"Index writer error: {e}")
+
+    def _coalesce(self, batch: List[_Op]):
+        """Pull further adds into the batch; return the first op that does not fit."""
+        size = len(batch[0].ids)
+        seen = set(batch[0].ids)
+        deadline = time.monotonic() + self.flush_interval
+        while size < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._producers <= len(batch):
+                    # Nobody else is about to submit: do not hold the batch back
+                    op = self._queue.get_nowait()
+                else:
+                    op = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            # Stop at anything that must be ordered after this batch, or that
+            # would repeat an id within a single commit
+            if op is _STOP or op.kind != "add" or size + len(op.ids) > self.batch_size or not seen.isdisjoint(op.ids):
+                return op
+            batch.append(op)
+            size += len(op.ids)
+            seen.update(op.ids)
+        return None
+
+    def _execute(self, batch: List[_Op]):
+        # Ops whose caller was cancelled before the write started are dropped
+        batch = [op for op in batch if op.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        op = batch[0]
+        if op.kind == "barrier":
+            op.future.set_result(None)
+            return
+        try:
+            store = self._store_getter()
+        except Exception as e:
+            for op in batch:
+                op.future.set_exception(e)
+            return
+        try:
+            if op.kind == "delete":
+                if op.ids:
+                    store.delete(ids=op.ids)
+                op.future.set_result(op.ids)
+                return
+            if op.kind == "update":
+                if op.ids:
+                    self._update_metadata(store, op.ids, [doc.metadata for doc in op.documents])
+                op.future.set_result(op.ids)
+                return
+            self._commit(store, batch)
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one by one so a single bad document does not fail the others
+                logger.warning(f"Batched index write of {len(batch)} requests failed ({e}); retrying individually")
+                for op in batch:
+                    try:
+                        self._commit(store, [op])
+                    except Exception as op_error:
+                        op.future.set_exception(op_error)
+                return
+            op.future.set_exception(e)
+
+    @staticmethod
+    def _update_metadata(store, ids: List[str], metadatas: List[dict]):
+        if hasattr(store, "update_metadata"):
+            store.update_metadata(ids, metadatas)
+        else:
+            # Chroma: update the collection directly (update_documents would re-embed)
+            store._collection.update(ids=ids, metadatas=metadatas)
+
+    def _commit(self, store, batch: List[_Op]):
+        documents = [doc for op in batch for doc in op.documents]
+        ids = [chunk_id for op in batch for chunk_id in op.ids]
+        started = time.perf_counter()
+        if ids:
+            store.add_documents(documents, ids=ids)
+        telemetry.INDEX_FLUSH.observe(time.perf_counter() - started)
+        telemetry.INDEX_FLUSH_CHUNKS.observe(len(ids))
+        self.stats["flushes"] += 1
+        self.stats["chunks"] += len(ids)
+        self.stats["requests"] += len(batch)
+        logger.debug("Index flush: %d chunks from %d requests in %.3fs", len(ids), len(batch), time.perf_counter() - started)
+        for op in batch:
+            op.future.set_result(op.ids)
@@ -0,0 +1,243 @@
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+from backend.core.config import settings
+from backend.core import telemetry
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+class OCREngine(ABC):
+    """Interface for OCR backends: image bytes in, plain text out."""
+
+    name = "base"
+
+    @abstractmethod
+    def recognize(self, image: bytes) -> str:
+        ...
+
+
+class EasyOCREngine(OCREngine):
+    """EasyOCR (optional dependency: pip install easyocr). The model loads on first use."""
+
+    name = "easyocr"
+
+    def __init__(self, languages: List[str]):
+        # Only check it is installed: importing easyocr pulls in torch
+        if importlib.util.find_spec("easyocr") is None:
+            raise ImportError("easyocr is not installed")
+        self.languages = languages
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def recognize(self, image: bytes) -> str:
+        with self._lock:
+            if self._reader is None:
+                import easyocr
+                self._reader = easyocr.Reader(self.languages, gpu=False, verbose=False)
+        return "\n".join(self._reader.readtext(image, detail=0, paragraph=True))
+
+
+class StubOCREngine(OCREngine):
+    """Offline engine for tests: returns `text` (or `text(image)` if callable) after an optional delay."""
+
+    name = "stub"
+
+    def __init__(self, text: Union[str, Callable[[bytes], str]] = "", delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+
+    def recognize(self, image: bytes) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.text(image) if callable(self.text) else self.text
+
+
+def engine_from_settings() -> Optional[OCREngine]:
+    if settings.OCR_ENGINE == "stub":
+        return StubOCREngine()
+    if settings.OCR_ENGINE == "easyocr":
+        try:
+            return EasyOCREngine(settings.OCR_LANGUAGES.split(","))
+        except ImportError:
+            logger.warning("OCR_ENGINE=easyocr but easyocr is not installed; image text will not be indexed")
+    return None
+
+
+def pdf_page_images(content: bytes, page_numbers: List[int]) -> List[Tuple[int, bytes]]:
+    """Embedded images of the given (1-based) PDF pages, e.g. the scan behind a text-less page."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(content))
+    images = []
+    for page_number in page_numbers:
+        if not 1 <= page_number <= len(reader.pages):
+            continue
+        try:
+            for image in reader.pages[page_number - 1].images:
+                images.append((page_number, image.data))
+        except Exception as e:
+            logger.warning(f"Could not read images on page {page_number}: {e}")
+    return images
+
+
+class OCRCache:
+    """OCR text on disk keyed by the image's SHA-256, so the same image is never recognised twice."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.txt")
+
+    def get(self, digest: str) -> Optional[str]:
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest: str, text: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(digest)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(digest))
+
+
+def _lower_priority():
+    """Worker thread initializer: raise the thread's nice value so OCR yields the CPU to chat traffic."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), settings.OCR_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class OCRQueue:
+    """Deferred OCR enrichment for uploads that have no text layer.
+
+    Image uploads (and PDF pages without extractable text) are acknowledged
+    right away with ocr_status "pending" on their catalog record. A small
+    pool of low-priority threads (OCR_CONCURRENCY) then runs the OCR engine,
+    caches the text by image hash, indexes it through the index writer with
+    "ocr": True in the chunk metadata and marks the record "done". Results for
+    a document that was deleted or re-uploaded in the meantime are dropped.
+    """
+
+    def __init__(self, file_service, engine: Optional[OCREngine], cache_dir: str, concurrency: int = 1):
+        self.file_service = file_service
+        self.engine = engine
+        self.cache = OCRCache(cache_dir)
+        self.concurrency = max(1, concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None
+
+    def submit(self, filename: str, digest: str, pages: Optional[List[int]] = None) -> Future:
+        """Queue OCR for an uploaded file; pages are the PDF pages to OCR (None: whole image / detect)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="ocr", initializer=_lower_priority
+                )
+        telemetry.OCR_PENDING.inc()
+        future = self._executor.submit(self._run, filename, digest, pages)
+        future.add_done_callback(lambda _: telemetry.OCR_PENDING.dec())
+        return future
+
+    def resume_pending(self) -> int:
+        """Re-queue documents still marked pending (e.g. after a restart)."""
+        pending = [r for r in self.file_service.list_documents() if r.ocr_status == "pending"]
+        for record in pending:
+            self.submit(record.filename, record.digest)
+        return len(pending)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _current(self, filename: str, digest: str):
+        record = self.file_service.catalog.get(filename)
+        return record if record is not None and record.digest == digest else None
+
+    def _recognize(self, image: bytes) -> str:
+        digest = hashlib.sha256(image).hexdigest()
+        text = self.cache.get(digest)
+        if text is None:
+            with telemetry.span("ocr.recognize", telemetry.OCR_SECONDS, engine=self.engine.name):
+                text = self.engine.recognize(image)
+            self.cache.put(digest, text)
+        return text
+
+    def _images(self, filename: str, content: bytes, pages: Optional[List[int]]) -> List[Tuple[Optional[int], bytes]]:
+        if filename.lower().endswith(".pdf"):
+            if pages is None:
+                text_pages, page_count = self.file_service.extract_pages(content, filename)
+                with_text = {p for p, t in text_pages or [] if t.strip()}
+                pages = [p for p in range(1, (page_count or 0) + 1) if p not in with_text]
+            return pdf_page_images(content, pages)
+        return [(None, content)]
+
+    def _run(self, filename: str, digest: str, pages: Optional[List[int]]) -> List[str]:
+        if self._current(filename, digest) is None:
+            return []
+        try:
+            with open(os.path.join(self.file_service.upload_dir, filename), "rb") as f:
+                content = f.read()
+            if hashlib.sha256(content).hexdigest() != digest:
+                return []
+            texts = {}
+            for page, image in self._images(filename, content, pages):
+                text = self._recognize(image).strip()
+                if text:
+                    texts.setdefault(page, []).append(text)
+            ocr_pages = [(page, "\n".join(parts)) for page, parts in texts.items()]
+            chunks = self.file_service.split_pages(filename, ocr_pages) if ocr_pages else []
+            for chunk in chunks:
+                chunk.metadata["ocr"] = True
+            # Separate id namespace so OCR chunks never collide with text-layer chunks
+            chunk_ids = self.file_service._chunk_ids(f"{filename}#ocr", chunks)
+            if chunks and self._current(filename, digest) is not None:
+                self.file_service.index_writer.add(chunks, chunk_ids).result()
+            status = "done"
+        except Exception as e:
+            logger.error(f"OCR of {filename} failed: {e}")
+            chunk_ids = []
+            status = "failed"
+
+        with self.file_service.catalog.lock:
+            record = self._current(filename, digest)
+            if record is None:
+                # Deleted or replaced while OCR was running: drop what we added
+                if chunk_ids:
+                    self.file_service.index_writer.delete(chunk_ids)
+                return []
+            record.chunk_ids = record.chunk_ids + [c for c in chunk_ids if c not in set(record.chunk_ids)]
+            record.ocr_status = status
+            self.file_service.catalog.put(record)
+        logger.info(f"OCR of {filename}: {status}, {len(chunk_ids)} chunks indexed")
+        return chunk_ids
+
+
+def _create_queue():
+    from backend.services.file_service import file_service
+    return OCRQueue(file_service, engine_from_settings(), settings.OCR_CACHE_DIR, settings.OCR_CONCURRENCY)
+
+
+ocr_queue = _create_queue()
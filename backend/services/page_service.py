@@ -0,0 +1,136 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from backend.core.config import settings
+from backend.services.document_catalog import DocumentRecord
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+
+class PageCache:
+    """Size-bounded on-disk cache of single-page PDF slices and page text.
+
+    Entries are keyed by the document digest, so a re-uploaded file never
+    serves stale slices. Slices are produced on first request and the least
+    recently used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # Rebuild LRU order from modification times left by previous runs
+        existing = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if os.path.isfile(path) and not name.endswith(".tmp"):
+                stat = os.stat(path)
+                existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self._total += size
+
+    @staticmethod
+    def etag(record: DocumentRecord, page: int) -> str:
+        # A page's text changes once pending OCR finishes
+        suffix = "-ocr-pending" if record.ocr_status == "pending" else ""
+        return f'"{record.digest[:16]}-{page}{suffix}"'
+
+    def _lookup(self, name: str) -> Optional[bytes]:
+        path = os.path.join(self.cache_dir, name)
+        # Read while holding the lock: a concurrent _store evicts files under it
+        with self._lock:
+            if name not in self._entries:
+                return None
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)
+            except FileNotFoundError:
+                self._total -= self._entries.pop(name, 0)
+                return None
+            self._entries.move_to_end(name)
+            return data
+
+    def _store(self, name: str, data: bytes):
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                evicted, size = self._entries.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(os.path.join(self.cache_dir, evicted))
+                except FileNotFoundError:
+                    pass
+
+    def _check_page(self, record: DocumentRecord, page: int):
+        if record.content_type != "pdf" or not record.page_count:
+            raise ValueError(f"{record.filename} is not a paged document")
+        if page < 1 or page > record.page_count:
+            raise IndexError(f"Page {page} out of range (1-{record.page_count})")
+
+    def page_pdf(self, record: DocumentRecord, source_path: str, page: int) -> bytes:
+        """Single-page PDF containing `page` (1-based) of the document."""
+        self._check_page(record, page)
+        name = f"{record.digest[:32]}-p{page}.pdf"
+        data = self._lookup(name)
+        if data is not None:
+            return data
+
+        from pypdf import PdfReader, PdfWriter
+        reader = PdfReader(source_path)
+        writer = PdfWriter()
+        writer.add_page(reader.pages[page - 1])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        logger.info(f"Sliced page {page} of {record.filename} ({buffer.tell()} bytes)")
+        data = buffer.getvalue()
+        self._store(name, data)
+        return data
+
+    @staticmethod
+    def _ocr_text(source_path: str, page: int) -> Optional[str]:
+        """OCR text of a scanned page from the OCR cache, or None until it has been recognised."""
+        from backend.services.ocr_service import ocr_queue, pdf_page_images
+        with open(source_path, "rb") as f:
+            images = pdf_page_images(f.read(), [page])
+        texts = [ocr_queue.cache.get(hashlib.sha256(image).hexdigest()) for _, image in images]
+        if any(text is None for text in texts):
+            return None
+        return "\n".join(text.strip() for text in texts if text.strip())
+
+    def page_text(self, record: DocumentRecord, source_path: str, page: int) -> str:
+        """Text of `page` (1-based) as indexed for search: its text layer, or the OCR text of a scanned page."""
+        self._check_page(record, page)
+        name = f"{record.digest[:32]}-p{page}.txt"
+        data = self._lookup(name)
+        if data is not None:
+            return data.decode("utf-8")
+
+        import pdfplumber
+        with pdfplumber.open(source_path) as pdf:
+            text = pdf.pages[page - 1].extract_text() or ""
+        if not text.strip() and record.ocr_status:
+            text = self._ocr_text(source_path, page)
+            if text is None:
+                # Still queued for OCR: don't cache the empty page
+                return ""
+        self._store(name, text.encode("utf-8"))
+        return text
+
+
+page_cache = PageCache(settings.PAGE_CACHE_DIR, settings.PAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,476 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+import logging
+
+# Setup logger
+logger = logging.getLogger("uvicorn.error")
+
+SUPPORTED_DTYPES = ("float16", "int8")
+# Rows converted to float32 at a time (search without a resident matrix,
+# and when building it); bounds the temporary working set
+SEARCH_BLOCK_ROWS = 4096
+# Candidates kept per requested result before exact float32 rescoring
+RESCORE_OVERSAMPLE = 4
+# Compact automatically once this fraction of rows is tombstoned
+COMPACT_TOMBSTONE_RATIO = 0.25
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force vector store over a memory-mapped, append-only matrix.
+
+    Vectors are L2-normalised and stored as float16, or as int8 with a
+    per-row scale. Search is a matrix product followed by an argpartition
+    top-k; with rescore=True an exact float32 copy is also kept and the
+    quantized candidates are re-ranked against it. Deletes only mark rows as
+    tombstones; compact() rewrites the files without them.
+
+    With resident=True (the default) the rows are also kept in RAM as one
+    float32 matrix, already dequantized and scaled, so a query is a single
+    BLAS matrix-vector product (4 bytes per dimension per row of memory).
+    With resident=False queries read the memory-mapped files and convert
+    them to float32 block by block, which keeps memory low but makes every
+    query cost a pass over the whole index.
+
+    On-disk layout (all append-only except meta.json):
+        vectors.bin  quantized rows
+        scales.bin   float32 per-row scale (int8 only)
+        exact.bin    float32 rows (rescore only)
+        rows.jsonl   one line per row ({"id", "text", "metadata"}), delete ({"del": id})
+                     or metadata update ({"upd": id, "metadata"})
+        meta.json    dim, dtype and committed row count
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Embeddings,
+        dtype: str = "float16",
+        rescore: bool = False,
+        resident: bool = True,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"dtype must be one of {SUPPORTED_DTYPES}")
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.dtype = dtype
+        self.rescore = rescore
+        self.resident = resident
+        self.dim: Optional[int] = None
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._exact: Optional[np.memmap] = None
+        # Resident float32 rows (with spare capacity past _matrix_rows for appends)
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_rows = 0
+
+        os.makedirs(persist_directory, exist_ok=True)
+        self._load()
+
+    # ------------------------------------------------------------------ storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    @property
+    def _storage_dtype(self):
+        return np.int8 if self.dtype == "int8" else np.float16
+
+    def _load(self):
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("dtype") != self.dtype or bool(meta.get("rescore")) != self.rescore:
+            raise ValueError(
+                f"Index at {self.persist_directory} was built with dtype={meta.get('dtype')}, "
+                f"rescore={meta.get('rescore')}; compact or rebuild it to change settings"
+            )
+        self.dim = meta["dim"]
+        rows = meta["rows"]
+
+        # Replay the row log in order: adds append rows, deletes tombstone them,
+        # updates replace a row's metadata
+        alive = []
+        uncommitted = 0
+        with open(self._path("rows.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "del" in entry:
+                    row = self._row_of.pop(entry["del"], None)
+                    if row is not None:
+                        alive[row] = False
+                    continue
+                if "upd" in entry:
+                    row = self._row_of.get(entry["upd"])
+                    if row is not None:
+                        self._metadatas[row] = entry["metadata"]
+                    continue
+                # Rows past the committed count belong to an interrupted append
+                if len(self._ids) >= rows:
+                    uncommitted += 1
+                    continue
+                row_id = entry["id"]
+                if row_id in self._row_of:
+                    alive[self._row_of[row_id]] = False
+                self._row_of[row_id] = len(self._ids)
+                self._ids.append(row_id)
+                self._texts.append(entry["text"])
+                self._metadatas.append(entry.get("metadata") or {})
+                alive.append(True)
+        self._alive = np.array(alive, dtype=bool)
+        if uncommitted or self._truncate(rows):
+            logger.warning(f"Discarding an interrupted append in {self.persist_directory}")
+            self._remap(rows)
+            self.compact(force=True)
+        else:
+            self._remap(rows)
+        logger.info(f"Loaded vector index with {int(self._alive.sum())} live rows from {self.persist_directory}")
+
+    def _remap(self, rows: int):
+        if rows == 0:
+            self._vectors = self._scales = self._exact = None
+            self._matrix, self._matrix_rows = None, 0
+            return
+        self._vectors = np.memmap(self._path("vectors.bin"), dtype=self._storage_dtype, mode="r", shape=(rows, self.dim))
+        if self.dtype == "int8":
+            self._scales = np.memmap(self._path("scales.bin"), dtype=np.float32, mode="r", shape=(rows,))
+        if self.rescore:
+            self._exact = np.memmap(self._path("exact.bin"), dtype=np.float32, mode="r", shape=(rows, self.dim))
+        if self.resident:
+            self._extend_matrix(rows)
+
+    def _dequantize(self, start: int, end: int) -> np.ndarray:
+        block = self._vectors[start:end].astype(np.float32)
+        if self._scales is not None:
+            block *= self._scales[start:end, None]
+        return block
+
+    def _extend_matrix(self, rows: int):
+        """Dequantize rows appended since the last call into the resident matrix."""
+        filled = self._matrix_rows if self._matrix is not None else 0
+        if self._matrix is None or rows > len(self._matrix):
+            # Grow with headroom; searches keep using the old buffer they snapshotted
+            matrix = np.empty((rows + rows // 4, self.dim), dtype=np.float32)
+            if filled:
+                matrix[:filled] = self._matrix[:filled]
+            self._matrix = matrix
+        for start in range(filled, rows, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, rows)
+            self._matrix[start:end] = self._dequantize(start, end)
+        self._matrix_rows = rows
+
+    def _truncate(self, rows: int) -> bool:
+        """Cut binary files back to the committed row count; True if anything was cut."""
+        row_bytes = {"vectors.bin": self.dim * np.dtype(self._storage_dtype).itemsize}
+        if self.dtype == "int8":
+            row_bytes["scales.bin"] = 4
+        if self.rescore:
+            row_bytes["exact.bin"] = self.dim * 4
+        truncated = False
+        for name, size in row_bytes.items():
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * size:
+                os.truncate(path, rows * size)
+                truncated = True
+        return truncated
+
+    def _write_meta(self, rows: int):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype, "rescore": self.rescore, "rows": rows}, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.dtype == "float16":
+            return vectors.astype(np.float16), None
+        scales = np.abs(vectors).max(axis=1)
+        scales[scales == 0] = 1.0
+        quantized = np.rint(vectors / scales[:, None] * 127.0).astype(np.int8)
+        return quantized, (scales / 127.0).astype(np.float32)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _append(self, ids: List[str], texts: List[str], metadatas: List[dict], embeddings: np.ndarray):
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+            # Re-added ids replace their previous row (upsert semantics)
+            replaced = [i for i in ids if i in self._row_of]
+            if replaced:
+                self._tombstone(replaced)
+
+            quantized, scales = self._quantize(vectors)
+            with open(self._path("vectors.bin"), "ab") as f:
+                f.write(quantized.tobytes())
+            if scales is not None:
+                with open(self._path("scales.bin"), "ab") as f:
+                    f.write(scales.tobytes())
+            if self.rescore:
+                with open(self._path("exact.bin"), "ab") as f:
+                    f.write(vectors.tobytes())
+            with open(self._path("rows.jsonl"), "a", encoding="utf-8") as f:
+                for row_id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": row_id, "text": text, "metadata": metadata}, separators=(",", ":")) + "\n")
+
+            start = len(self._ids)
+            for offset, row_id in enumerate(ids):
+                self._row_of[row_id] = start + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            rows = len(self._ids)
+            self._write_meta(rows)
+            self._remap(rows)
+
+    def _tombstone(self, ids: List[str]) -> int:
+        removed = 0
+        with open(self._path("rows.jsonl"), "a", encoding="utf-8") as f:
+            for row_id in ids:
+                row = self._row_of.pop(row_id, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                f.write(json.dumps({"del": row_id}, separators=(",", ":")) + "\n")
+                removed += 1
+        return removed
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]) -> int:
+        """Replace the metadata of existing rows; unknown ids are ignored."""
+        updated = 0
+        with self._lock, open(self._path("rows.jsonl"), "a", encoding="utf-8") as f:
+            for row_id, metadata in zip(ids, metadatas):
+                row = self._row_of.get(row_id)
+                if row is None:
+                    continue
+                # Searches may hold a snapshot of the list: replace the element, never edit the dict
+                self._metadatas[row] = dict(metadata)
+                f.write(json.dumps({"upd": row_id, "metadata": metadata}, separators=(",", ":")) + "\n")
+                updated += 1
+        return updated
+
+    def compact(self, force: bool = False):
+        """Rewrite the index without tombstoned rows."""
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            if len(live) == len(self._alive) and not force:
+                return
+            logger.info(f"Compacting vector index: {len(self._alive) - len(live)} tombstones, {len(live)} live rows")
+            names = ["vectors.bin"]
+            arrays = [self._vectors]
+            if self.dtype == "int8":
+                names.append("scales.bin")
+                arrays.append(self._scales)
+            if self.rescore:
+                names.append("exact.bin")
+                arrays.append(self._exact)
+            suffix = ".compact"
+            for name, array in zip(names, arrays):
+                with open(self._path(name + suffix), "wb") as f:
+                    if len(live):
+                        array[live].tofile(f)
+            with open(self._path("rows.jsonl" + suffix), "w", encoding="utf-8") as f:
+                for row in live:
+                    f.write(json.dumps(
+                        {"id": self._ids[row], "text": self._texts[row], "metadata": self._metadatas[row]},
+                        separators=(",", ":")
+                    ) + "\n")
+
+            # Drop the old mappings before replacing the files underneath them;
+            # the resident matrix is rebuilt for the renumbered rows
+            self._vectors = self._scales = self._exact = None
+            self._matrix, self._matrix_rows = None, 0
+            for name in names + ["rows.jsonl"]:
+                os.replace(self._path(name + suffix), self._path(name))
+
+            self._ids = [self._ids[row] for row in live]
+            self._texts = [self._texts[row] for row in live]
+            self._metadatas = [self._metadatas[row] for row in live]
+            self._row_of = {row_id: row for row, row_id in enumerate(self._ids)}
+            self._alive = np.ones(len(live), dtype=bool)
+            self._write_meta(len(live))
+            self._remap(len(live))
+
+    # ------------------------------------------------------------------ search
+
+    def _scores(self, query: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        n = vectors.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, n)
+            scores[start:end] = vectors[start:end].astype(np.float32) @ query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    @staticmethod
+    def _filter_mask(filter: Optional[dict], metadatas: List[dict], n: int) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+        mask = np.zeros(n, dtype=bool)
+        for row in range(n):
+            metadata = metadatas[row]
+            mask[row] = all(metadata.get(key) == value for key, value in filter.items())
+        return mask
+
+    def _search(self, embedding: List[float], k: int, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        # Snapshot everything a search reads: a concurrent delete may compact
+        # (renumber) the rows, but it swaps in new arrays/lists rather than
+        # changing these in place, and appends only ever add rows past n.
+        with self._lock:
+            vectors, scales, exact, matrix = self._vectors, self._scales, self._exact, self._matrix
+            if vectors is None or k <= 0:
+                return []
+            n = vectors.shape[0]
+            valid = self._alive[:n].copy()
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+
+        if matrix is not None:
+            scores = matrix[:n] @ query
+        else:
+            scores = self._scores(query, vectors, scales)
+        mask = self._filter_mask(filter, metadatas, n)
+        if mask is not None:
+            valid &= mask
+        scores[~valid] = -np.inf
+        available = int(valid.sum())
+        if available == 0:
+            return []
+
+        candidates = min(available, k * RESCORE_OVERSAMPLE if exact is not None else k)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        if exact is not None:
+            # Re-rank quantized candidates with the exact float32 vectors
+            top = np.sort(top)
+            scores = np.full(n, -np.inf, dtype=np.float32)
+            scores[top] = exact[top] @ query
+        top = top[np.argsort(-scores[top], kind="stable")][:k]
+        return [
+            (Document(id=ids[row], page_content=texts[row], metadata=dict(metadatas[row])), float(scores[row]))
+            for row in top
+        ]
+
+    def _to_document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    # ------------------------------------------------------------------ VectorStore interface
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        embeddings = self.embedding_function.embed_documents(texts)
+        self._append(ids, texts, metadatas, np.asarray(embeddings, dtype=np.float32))
+        return ids
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Add rows whose embeddings were computed elsewhere."""
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        self._append(ids, list(texts), metadatas, np.asarray(embeddings, dtype=np.float32))
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            removed = self._tombstone(ids)
+            if len(self._alive) and 1 - self._alive.mean() >= COMPACT_TOMBSTONE_RATIO:
+                self.compact()
+        return removed > 0
+
+    def get_by_ids(self, ids, /) -> List[Document]:
+        with self._lock:
+            rows = [self._row_of[i] for i in ids if i in self._row_of]
+            return [self._to_document(row) for row in rows]
+
+    def ids(self) -> List[str]:
+        """Ids of every live row."""
+        with self._lock:
+            return list(self._row_of)
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self._search(embedding, k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "backend/vector_index",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
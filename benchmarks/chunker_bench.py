@@ -0,0 +1,113 @@
+"""Chunker benchmark: the structure-aware chunker vs the previous character splitter.
+
+Extracts the pages of a synthetic corpus (benchmarks/corpus.py) the way
+FileService does and chunks them with both
+  - "recursive": RecursiveCharacterTextSplitter(chunk_size=256, chunk_overlap=50),
+    the splitter ingestion used before backend/services/chunker.py, and
+  - "structured": chunk_pages() with the CHUNK_* settings,
+reporting chunk count, chunk size (approximate tokens), the share of chunks
+that end mid-sentence and throughput. --scale N also chunks one document
+made of the whole corpus text repeated N times, to show large-input cost:
+
+    python benchmarks/chunker_bench.py --preset medium --scale 50 --output chunker.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+CLEAN_ENDINGS = ".!?:;\"')]}`"
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0
+
+
+def recursive_chunks(pages):
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=256, chunk_overlap=50)
+    documents = [Document(page_content=text, metadata={"page": page}) for page, text in pages]
+    return [d.page_content for d in splitter.split_documents(documents)]
+
+
+def structured_chunks(pages, code=False):
+    from backend.core.config import settings
+    from backend.services.chunker import chunk_pages
+    chunks = chunk_pages(pages, target_tokens=settings.CHUNK_TARGET_TOKENS,
+                         max_tokens=settings.CHUNK_MAX_TOKENS, max_chars=settings.CHUNK_MAX_CHARS, code=code)
+    return [c.text for c in chunks]
+
+
+CHUNKERS = {"recursive": recursive_chunks, "structured": structured_chunks}
+
+
+def measure(name, documents, repeat):
+    """Chunk every (filename, pages) document `repeat` times; stats from the last run."""
+    from backend.services.chunker import CODE_EXTENSIONS, count_tokens
+    split = CHUNKERS[name]
+    total_chars = sum(len(text) for _, pages in documents for _, text in pages)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = []
+        for filename, pages in documents:
+            if name == "structured":
+                chunks += split(pages, code=os.path.splitext(filename)[1] in CODE_EXTENSIONS)
+            else:
+                chunks += split(pages)
+        best = min(best, time.perf_counter() - started)
+    tokens = [count_tokens(c) for c in chunks]
+    return {
+        "chunks": len(chunks),
+        "tokens_mean": round(sum(tokens) / len(tokens), 1) if tokens else 0,
+        "tokens_p95": percentile(tokens, 0.95),
+        "chars_mean": round(sum(len(c) for c in chunks) / len(chunks), 1) if chunks else 0,
+        "mid_sentence_pct": round(100 * sum(c.rstrip()[-1:] not in CLEAN_ENDINGS for c in chunks) / max(1, len(chunks)), 1),
+        "seconds": round(best, 4),
+        "mb_per_s": round(total_chars / 2**20 / best, 2) if best else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", default="small", choices=["small", "medium", "large"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per chunker; the fastest is reported")
+    parser.add_argument("--scale", type=int, default=0, help="Also chunk the corpus text repeated N times as one document")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    from benchmarks.corpus import generate_corpus
+    from backend.services.file_service import file_service
+
+    files, _ = generate_corpus(args.preset, seed=args.seed)
+    documents = []
+    for filename, content in files:
+        pages, _ = file_service.extract_pages(content, filename)
+        documents.append((filename, pages or []))
+
+    result = {
+        "params": {"preset": args.preset, "seed": args.seed, "repeat": args.repeat, "scale": args.scale},
+        "corpus": {"documents": len(documents), "chars": sum(len(t) for _, p in documents for _, t in p)},
+        "corpus_results": {name: measure(name, documents, args.repeat) for name in CHUNKERS},
+    }
+    if args.scale:
+        text = "\n\n".join(t for _, pages in documents for _, t in pages if t.strip()) * args.scale
+        large = [("large.txt", [(None, text)])]
+        result["large_document"] = {"chars": len(text)}
+        result["large_results"] = {name: measure(name, large, 1) for name in CHUNKERS}
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
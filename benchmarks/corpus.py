@@ -0,0 +1,147 @@
+"""Reproducible synthetic corpora for ingestion and retrieval benchmarks.
+
+Every page or section of every generated document contains one unique
+"fact" sentence, and each fact comes with a labelled query naming the
+document (and page) that answers it, for recall@k measurements.
+
+    from benchmarks.corpus import generate_corpus
+    files, queries = generate_corpus("small", seed=7)
+"""
+import io
+import json
+import random
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+WORDS = (
+    "system data model vector search index query result document page chunk text token embed store "
+    "latency memory throughput cache file upload stream event agent tool retrieval answer citation "
+    "report analysis design network server client request response batch queue worker thread process "
+    "storage metric trace budget version update schema table column record field value signal noise"
+).split()
+
+PROJECTS = (
+    "aurora basalt cobalt dynamo ember falcon garnet harbor indigo jasper kestrel lumen meridian nimbus "
+    "onyx pioneer quartz raven sierra tundra umber vertex willow xenon yonder zephyr"
+).split()
+
+# name -> {format: (documents, pages or sections per document)}
+PRESETS = {
+    "small": {"pdf": (3, 4), "docx": (3, 3), "txt": (4, 2), "md": (3, 3), "json": (3, 2)},
+    "medium": {"pdf": (10, 12), "docx": (8, 8), "txt": (12, 6), "md": (10, 6), "json": (8, 5)},
+    "large": {"pdf": (25, 40), "docx": (15, 20), "txt": (30, 15), "md": (25, 15), "json": (20, 12)},
+}
+
+PARAGRAPHS_PER_PAGE = 4
+SENTENCES_PER_PARAGRAPH = 5
+
+
+@dataclass
+class LabelledQuery:
+    query: str
+    source: str
+    page: Optional[int] = None
+
+
+def make_pdf(pages: List[str], line_chars: int = 90) -> bytes:
+    """Minimal uncompressed PDF with Helvetica text, one string per page, word-wrapped."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = []
+        for paragraph in text.split("\n"):
+            line = ""
+            for word in paragraph.split():
+                if line and len(line) + len(word) + 1 > line_chars:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = f"{line} {word}" if line else word
+            lines.append(line)
+        escaped = [l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for l in lines]
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({l}) Tj T*" for l in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def make_docx(sections: List[str]) -> bytes:
+    import docx
+    document = docx.Document()
+    for i, section in enumerate(sections, start=1):
+        document.add_heading(f"Section {i}", level=1)
+        for paragraph in section.split("\n"):
+            document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class _Writer:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.fact_counter = 0
+
+    def sentence(self) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(8, 16))
+        return " ".join(words).capitalize() + "."
+
+    def fact(self) -> Tuple[str, str]:
+        project = f"{PROJECTS[self.fact_counter % len(PROJECTS)]}-{self.fact_counter // len(PROJECTS)}"
+        code = f"{self.rng.randint(1000, 9999)}-{self.rng.choice(WORDS)}"
+        self.fact_counter += 1
+        return (f"The access code for project {project} is {code}.",
+                f"What is the access code for project {project}?")
+
+    def section(self) -> Tuple[str, str]:
+        """A page/section of filler paragraphs with one fact in a random paragraph."""
+        fact, query = self.fact()
+        paragraphs = []
+        fact_at = self.rng.randrange(PARAGRAPHS_PER_PAGE)
+        for p in range(PARAGRAPHS_PER_PAGE):
+            sentences = [self.sentence() for _ in range(SENTENCES_PER_PARAGRAPH)]
+            if p == fact_at:
+                sentences.insert(self.rng.randrange(len(sentences)), fact)
+            paragraphs.append(" ".join(sentences))
+        return "\n".join(paragraphs), query
+
+
+def generate_corpus(preset: str = "small", seed: int = 7) -> Tuple[List[Tuple[str, bytes]], List[LabelledQuery]]:
+    """Return ([(filename, content)], [LabelledQuery]) for a preset size."""
+    writer = _Writer(seed)
+    files = []
+    queries = []
+    for fmt, (documents, sections) in PRESETS[preset].items():
+        for d in range(documents):
+            filename = f"bench_{fmt}_{d:03d}.{fmt}"
+            bodies = []
+            for s in range(sections):
+                body, query = writer.section()
+                bodies.append(body)
+                queries.append(LabelledQuery(query, filename, s + 1 if fmt == "pdf" else None))
+            if fmt == "pdf":
+                content = make_pdf(bodies)
+            elif fmt == "docx":
+                content = make_docx(bodies)
+            elif fmt == "md":
+                content = "\n\n".join(f"## Section {i}\n\n" + b.replace("\n", "\n\n")
+                                      for i, b in enumerate(bodies, start=1)).encode("utf-8")
+            elif fmt == "json":
+                content = json.dumps({"sections": [{"id": i, "paragraphs": b.split("\n")}
+                                                   for i, b in enumerate(bodies, start=1)]}, indent=2).encode("utf-8")
+            else:
+                content = "\n\n".join(bodies).encode("utf-8")
+            files.append((filename, content))
+    return files, queries
@@ -0,0 +1,245 @@
+"""Ingestion and retrieval micro-benchmark for FileService.
+
+Generates a reproducible synthetic corpus (benchmarks/corpus.py), ingests it
+through FileService.ingest_file and reports per-stage timings (extraction,
+chunking, embedding, vector-store insert), retrieval latency and recall@k /
+MRR over the corpus' labelled queries for get_retriever(), and memory high
+water marks. Results can be saved as a baseline and later runs compared
+against it:
+
+    python benchmarks/ingest_bench.py --preset small --save-baseline
+    python benchmarks/ingest_bench.py --preset small --fail-on-regression
+
+--concurrency N ingests N files at a time through the shared index writer;
+stage timings are summed per document, so with N > 1 they include time
+spent waiting on the writer queue.
+
+--embeddings fastembed uses the production model (needs the model files);
+"hashing" is an offline bag-of-words embedding good enough for recall
+comparisons between chunkers and backends; "fake" is random and only useful
+for timing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# metric -> True if higher is better
+METRIC_DIRECTIONS = {
+    "extract_s": False, "chunk_s": False, "embed_s": False, "insert_s": False, "ingest_total_s": False,
+    "docs_per_s": True, "chunks": False, "query_embed_p50_ms": False, "retrieval_p50_ms": False,
+    "retrieval_p95_ms": False, "recall_at_k": True, "mrr": True, "python_peak_mb": False, "peak_rss_mb": False,
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashed bag of words (unigrams + bigrams), L2-normalised."""
+
+    def __init__(self, size: int = 384):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        tokens = re.findall(r"[a-z0-9]+", text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.size] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class TimingEmbeddings(Embeddings):
+    """Delegating wrapper that accumulates time spent embedding."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.document_seconds = 0.0
+        self.query_samples = []
+
+    def embed_documents(self, texts):
+        started = time.perf_counter()
+        try:
+            return self.inner.embed_documents(texts)
+        finally:
+            self.document_seconds += time.perf_counter() - started
+
+    def embed_query(self, text):
+        started = time.perf_counter()
+        try:
+            return self.inner.embed_query(text)
+        finally:
+            self.query_samples.append(time.perf_counter() - started)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run(args):
+    from benchmarks.corpus import generate_corpus
+    from backend.services.file_service import file_service
+
+    files, queries = generate_corpus(args.preset, seed=args.seed)
+    file_service.upload_dir = tempfile.mkdtemp(prefix="bench_uploads_")
+    if args.embeddings == "hashing":
+        file_service._embeddings = HashingEmbeddings()
+    timing = TimingEmbeddings(file_service.embeddings)
+    file_service._embeddings = timing
+    file_service.vector_store  # open the store outside the timed section
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    stages = {"extract": 0.0, "chunk": 0.0, "index": 0.0}
+    total_bytes = sum(len(content) for _, content in files)
+    # Concurrent uploads share the index writer, which coalesces their chunks
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def ingest(filename, content):
+        async with semaphore:
+            await file_service.ingest_file(content, filename)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(ingest(filename, content) for filename, content in files))
+    for filename, _ in files:
+        record = file_service.catalog.get(filename)
+        for stage in stages:
+            stages[stage] += record.stage_seconds.get(stage, 0.0)
+    ingest_total = time.perf_counter() - started
+    python_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else 0
+    if args.tracemalloc:
+        tracemalloc.stop()
+    chunks = sum(r.chunk_count for r in file_service.list_documents())
+
+    retriever = file_service.get_retriever()
+    timing.query_samples.clear()
+    latencies = []
+    hits = 0
+    reciprocal_ranks = 0.0
+    for labelled in queries:
+        started = time.perf_counter()
+        docs = await retriever.ainvoke(labelled.query)
+        latencies.append(time.perf_counter() - started)
+        for rank, doc in enumerate(docs[:args.k], start=1):
+            if doc.metadata.get("source") == labelled.source and (
+                labelled.page is None or doc.metadata.get("page") == labelled.page
+            ):
+                hits += 1
+                reciprocal_ranks += 1.0 / rank
+                break
+
+    embed_seconds = timing.document_seconds
+    metrics = {
+        "extract_s": round(stages["extract"], 4),
+        "chunk_s": round(stages["chunk"], 4),
+        "embed_s": round(embed_seconds, 4),
+        "insert_s": round(max(0.0, stages["index"] - embed_seconds), 4),
+        "ingest_total_s": round(ingest_total, 4),
+        "docs_per_s": round(len(files) / ingest_total, 2),
+        "mb_per_s": round(total_bytes / 2**20 / ingest_total, 3),
+        "chunks": chunks,
+        "index_flushes": file_service.index_writer.stats["flushes"],
+        "query_embed_p50_ms": round(percentile(timing.query_samples, 0.5) * 1000, 3),
+        "retrieval_p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "retrieval_p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "recall_at_k": round(hits / len(queries), 4),
+        "mrr": round(reciprocal_ranks / len(queries), 4),
+        "python_peak_mb": round(python_peak / 2**20, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    return {
+        "params": {"preset": args.preset, "seed": args.seed, "embeddings": args.embeddings,
+                   "backend": args.backend, "k": args.k, "concurrency": args.concurrency},
+        "corpus": {"documents": len(files), "bytes": total_bytes, "queries": len(queries)},
+        "metrics": metrics,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Print metric deltas against a baseline; return the list of regressions."""
+    regressions = []
+    print("\nComparison with baseline:")
+    for name, higher_is_better in METRIC_DIRECTIONS.items():
+        old = baseline["metrics"].get(name)
+        new = result["metrics"].get(name)
+        if old in (None, 0) or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<20} {old:>12} -> {new:>12}  ({change * 100:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", default="small", choices=["small", "medium", "large"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embeddings", default="hashing", choices=["hashing", "fastembed", "fake"])
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="Files ingested concurrently")
+    parser.add_argument("--tracemalloc", action="store_true", help="Track Python heap peak (slows ingestion)")
+    parser.add_argument("--baseline", help="Baseline JSON (default: benchmarks/baselines/ingest_<preset>_<embeddings>_<backend>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    data_dir = tempfile.mkdtemp(prefix="ingest_bench_")
+    os.environ.update({
+        "EMBEDDING_PROVIDER": "fastembed" if args.embeddings == "fastembed" else "fake",
+        "VECTOR_BACKEND": args.backend,
+        "CHROMA_PERSIST_DIR": os.path.join(data_dir, "chroma"),
+        "VECTOR_INDEX_DIR": os.path.join(data_dir, "vector_index"),
+        "WARMUP_ON_STARTUP": "false",
+    })
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    baseline_path = args.baseline or os.path.join(
+        BASELINE_DIR, f"ingest_{args.preset}_{args.embeddings}_{args.backend}.json"
+    )
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved baseline to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Offline end-to-end load test of the chat API with a scripted fake LLM.
+
+Runs backend.main:app in-process under uvicorn with LLM_PROVIDER=fake and
+EMBEDDING_PROVIDER=fake, then drives POST /api/chat + GET /api/chat/stream/{job_id}
+at the requested concurrency. No network access or API keys are needed.
+--transport ws runs the same turns multiplexed over --ws-connections
+WebSocket connections to /api/chat/ws instead.
+
+Reports time-to-first-token, inter-token latency percentiles, throughput,
+event-loop lag (client and server share the loop) and peak RSS, and can write
+the results as JSON and compare them with a previous run:
+
+    python benchmarks/load_test.py --concurrency 200 --turns 1000 --output load.json
+    python benchmarks/load_test.py --concurrency 200 --turns 1000 --compare load.json
+
+Use --url to target an already-running server instead (start it with
+LLM_PROVIDER=fake EMBEDDING_PROVIDER=fake); event-loop lag then measures the
+client only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+
+def percentiles(samples, scale=1000.0):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale, 3)
+
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(ordered[-1] * scale, 3)}
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up, i.e. event-loop blocking."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+async def run_turn(client, base_url, index, stats):
+    started = time.perf_counter()
+    response = await client.post(f"{base_url}/api/chat/", json={"query": f"load test question {index}"})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    thread_id = f"load-{uuid.uuid4().hex[:8]}"
+
+    first_token = None
+    last_token = None
+    tokens = 0
+    nbytes = 0
+    async with client.stream("GET", f"{base_url}/api/chat/stream/{job_id}", params={"thread_id": thread_id}) as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            nbytes += len(line) + 2
+            payload = line[6:]
+            if payload == "[DONE]":
+                break
+            event = json.loads(payload)
+            if event.get("type") == "error":
+                raise RuntimeError(event.get("content"))
+            if event.get("type") != "text":
+                continue
+            now = time.perf_counter()
+            if first_token is None:
+                first_token = now
+                stats["ttft"].append(now - started)
+            else:
+                stats["itl"].append(now - last_token)
+            last_token = now
+            tokens += 1
+    stats["turn"].append(time.perf_counter() - started)
+    stats["tokens"] += tokens
+    stats["bytes"] += nbytes
+
+
+async def drive(base_url, args):
+    import httpx
+
+    stats = {"ttft": [], "itl": [], "turn": [], "tokens": 0, "bytes": 0, "errors": 0, "error_samples": []}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2 + 10, max_keepalive_connections=args.concurrency * 2)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout), limits=limits) as client:
+        async def one(index):
+            async with semaphore:
+                try:
+                    await run_turn(client, base_url, index, stats)
+                except Exception as e:
+                    stats["errors"] += 1
+                    if len(stats["error_samples"]) < 5:
+                        stats["error_samples"].append(repr(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.turns)))
+        elapsed = time.perf_counter() - started
+    return stats, elapsed
+
+
+class SocketClient:
+    """One multiplexed /api/chat/ws connection: routes frames to per-job queues and grants credit.
+
+    Turns wait for one of the connection's max_jobs slots (announced in the
+    server's hello frame) before they start.
+    """
+
+    def __init__(self, websocket, hello):
+        self.websocket = websocket
+        self.jobs = {}
+        self.received = 0
+        self.nbytes = 0
+        self.credit_step = max(1, hello.get("credit", 256) // 2)
+        self.max_jobs = hello.get("max_jobs", 16)
+        self.slots = asyncio.Semaphore(self.max_jobs)
+        self._reader = asyncio.create_task(self._read())
+
+    @classmethod
+    async def connect(cls, ws_url):
+        import websockets
+
+        websocket = await websockets.connect(ws_url, max_queue=None)
+        hello = json.loads(await websocket.recv())["e"]
+        return cls(websocket, hello)
+
+    async def _read(self):
+        async for message in self.websocket:
+            self.nbytes += len(message)
+            frame = json.loads(message)
+            job_id = frame["j"]
+            if job_id is None:
+                # Connection-level frame; a rejected start names its job in the event
+                job_id = frame["e"].get("j")
+            else:
+                self.received += 1
+                if self.received % self.credit_step == 0:
+                    await self.websocket.send(json.dumps({"op": "credit", "n": self.credit_step}))
+            queue = self.jobs.get(job_id)
+            if queue is not None:
+                queue.put_nowait(frame["e"])
+
+    async def turn(self, query, thread_id):
+        async with self.slots:
+            job_id = uuid.uuid4().hex[:12]
+            queue = self.jobs[job_id] = asyncio.Queue()
+            await self.websocket.send(json.dumps({"op": "start", "j": job_id, "q": query, "t": thread_id}))
+            try:
+                while True:
+                    event = await queue.get()
+                    yield event
+                    if event["type"] in ("done", "cancelled"):
+                        return
+            finally:
+                del self.jobs[job_id]
+
+    async def close(self):
+        self._reader.cancel()
+        await self.websocket.close()
+
+
+async def run_ws_turn(socket, index, stats):
+    started = time.perf_counter()
+    thread_id = f"load-{uuid.uuid4().hex[:8]}"
+    first_token = None
+    last_token = None
+    tokens = 0
+    async for event in socket.turn(f"load test question {index}", thread_id):
+        if event.get("type") == "error":
+            raise RuntimeError(event.get("content"))
+        if event.get("type") != "text":
+            continue
+        now = time.perf_counter()
+        if first_token is None:
+            first_token = now
+            stats["ttft"].append(now - started)
+        else:
+            stats["itl"].append(now - last_token)
+        last_token = now
+        tokens += 1
+    stats["turn"].append(time.perf_counter() - started)
+    stats["tokens"] += tokens
+
+
+async def drive_ws(base_url, args):
+    stats = {"ttft": [], "itl": [], "turn": [], "tokens": 0, "bytes": 0, "errors": 0, "error_samples": []}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    ws_url = base_url.replace("http", "ws", 1) + "/api/chat/ws"
+    sockets = [await SocketClient.connect(ws_url)]
+    # By default open just enough connections for the requested concurrency
+    connections = args.ws_connections or -(-args.concurrency // sockets[0].max_jobs)
+    sockets += [await SocketClient.connect(ws_url) for _ in range(connections - 1)]
+
+    async def one(index):
+        async with semaphore:
+            try:
+                await asyncio.wait_for(run_ws_turn(sockets[index % len(sockets)], index, stats), args.timeout)
+            except Exception as e:
+                stats["errors"] += 1
+                if len(stats["error_samples"]) < 5:
+                    stats["error_samples"].append(repr(e))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.turns)))
+    elapsed = time.perf_counter() - started
+    stats["bytes"] = sum(socket.nbytes for socket in sockets)
+    for socket in sockets:
+        await socket.close()
+    return stats, elapsed
+
+
+async def main_async(args):
+    monitor = LoopLagMonitor()
+    server = None
+    server_task = None
+    base_url = args.url
+    if not base_url:
+        import uvicorn
+        from backend.main import app
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning",
+                                loop="asyncio", backlog=4096, timeout_keep_alive=30)
+        server = uvicorn.Server(config)
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    monitor.start()
+    try:
+        stats, elapsed = await (drive_ws if args.transport == "ws" else drive)(base_url, args)
+    finally:
+        monitor.stop()
+        if server:
+            server.should_exit = True
+            await server_task
+
+    completed = len(stats["turn"])
+    return {
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "completed": completed,
+        "errors": stats["errors"],
+        "error_samples": stats["error_samples"],
+        "elapsed_seconds": round(elapsed, 3),
+        "turns_per_second": round(completed / elapsed, 2) if elapsed else 0,
+        "tokens_per_second": round(stats["tokens"] / elapsed, 1) if elapsed else 0,
+        "sse_bytes": stats["bytes"],
+        "ttft_ms": percentiles(stats["ttft"]),
+        "inter_token_ms": percentiles(stats["itl"]),
+        "turn_ms": percentiles(stats["turn"]),
+        "loop_lag_ms": percentiles(monitor.samples),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare(result, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path}:")
+    rows = [("turns_per_second", None), ("tokens_per_second", None), ("peak_rss_mb", None),
+            ("ttft_ms", "p50"), ("ttft_ms", "p99"), ("inter_token_ms", "p99"), ("loop_lag_ms", "p99")]
+    for key, sub in rows:
+        old = baseline.get(key, {}).get(sub) if sub else baseline.get(key)
+        new = result.get(key, {}).get(sub) if sub else result.get(key)
+        if old in (None, 0) or new is None:
+            continue
+        label = f"{key}.{sub}" if sub else key
+        print(f"  {label:<24} {old:>10} -> {new:>10}  ({(new - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=200, help="Total chat turns to run")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--tool-pattern", default="none", choices=["none", "search", "list", "mixed"])
+    parser.add_argument("--transport", default="sse", choices=["sse", "ws"])
+    parser.add_argument("--ws-connections", type=int,
+                        help="WebSocket connections to multiplex turns over (default: concurrency / server max_jobs)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Target an external server instead of running one in-process")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Compare with a previous JSON result")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    data_dir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "EMBEDDING_PROVIDER": "fake",
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_FIRST_TOKEN_LATENCY": str(args.first_token_latency),
+        "FAKE_LLM_RESPONSE_TOKENS": str(args.response_tokens),
+        "FAKE_LLM_TOOL_PATTERN": args.tool_pattern,
+        "CHROMA_PERSIST_DIR": os.path.join(data_dir, "chroma"),
+        "VECTOR_INDEX_DIR": os.path.join(data_dir, "vector_index"),
+    })
+
+    result = asyncio.run(main_async(args))
+    print(json.dumps(result, indent=2))
+    if args.compare:
+        compare(result, args.compare)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Latency and recall comparison of the NumPy vector index against Chroma.
+
+Uses synthetic clustered 384-dim vectors (the bge-small embedding size) so no
+embedding model is needed. Ground truth is exact float32 cosine top-k.
+
+    python benchmarks/vector_index_bench.py --rows 50000 --queries 200
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+from langchain_chroma import Chroma
+from backend.services.vector_index import NumpyVectorStore
+
+
+class LookupEmbeddings(Embeddings):
+    """Returns precomputed vectors for known texts."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.table[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.table[text]
+
+
+def make_corpus(rows, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + rng.normal(scale=0.6, size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors, count, seed):
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(vectors), size=count)
+    queries = vectors[picks] + rng.normal(scale=0.05, size=(count, vectors.shape[1])).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3), "mean_ms": round(float(ms.mean()), 3)}
+
+
+def run_backend(name, store, texts, vectors, queries, truth, k, batch):
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch):
+        store.add_texts(texts[start:start + batch], ids=texts[start:start + batch])
+    build_seconds = time.perf_counter() - started
+
+    # Warm up caches / lazy initialisation before timing
+    store.similarity_search_by_vector(queries[0].tolist(), k=k)
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        docs = store.similarity_search_by_vector(query.tolist(), k=k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(expected & {doc.page_content for doc in docs})
+    result = {
+        "backend": name,
+        "build_seconds": round(build_seconds, 3),
+        f"recall@{k}": round(hits / (len(queries) * k), 4),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    result.update(percentiles(latencies))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backends", default="numpy-f16,numpy-int8,numpy-int8-rescore,chroma")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    vectors = make_corpus(args.rows, args.dim, args.clusters, args.seed)
+    queries = make_queries(vectors, args.queries, args.seed)
+    texts = [f"doc-{i}" for i in range(args.rows)]
+    table = {text: vec.tolist() for text, vec in zip(texts, vectors)}
+    embeddings = LookupEmbeddings(table)
+    truth = [{texts[i] for i in np.argpartition(-(vectors @ q), args.k - 1)[:args.k]} for q in queries]
+
+    configs = {
+        "numpy-f16": dict(dtype="float16", rescore=False),
+        "numpy-int8": dict(dtype="int8", rescore=False),
+        "numpy-int8-rescore": dict(dtype="int8", rescore=True),
+        # Score the memory-mapped rows directly (no resident float32 matrix)
+        "numpy-int8-mmap": dict(dtype="int8", rescore=False, resident=False),
+        "numpy-f16-mmap": dict(dtype="float16", rescore=False, resident=False),
+    }
+    results = []
+    # Each backend runs in its own process-lifetime, so max RSS is cumulative;
+    # run a single backend per invocation for clean memory numbers.
+    for name in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            if name == "chroma":
+                store = Chroma(collection_name="bench", persist_directory=tmp, embedding_function=embeddings,
+                               collection_metadata={"hnsw:space": "cosine"})
+            else:
+                store = NumpyVectorStore(tmp, embeddings, **configs[name])
+            result = run_backend(name, store, texts, vectors, queries, truth, args.k, args.batch)
+            result["disk_mb"] = round(sum(
+                os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp) for f in files
+            ) / 2**20, 2)
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
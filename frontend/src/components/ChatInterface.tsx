@@ -74,7 +74,75 @@ export const ChatInterface: React.FC = () => {
         setPendingFiles(prev => prev.filter((_, i) => i !== index));
     };
 
+    const isArchive = (name: string) => /\.(zip|tar|tgz|tbz2|txz|tar\.(gz|bz2|xz))$/i.test(name);
+
+    // Several files or an archive go to the bulk endpoint, which ingests them in
+    // parallel and streams one NDJSON line per file followed by a summary
+    const uploadBulk = async (files: File[]) => {
+        const uploadedCitations: any[] = [];
+        setIsUploading(true);
+        setUploadProgress(`Uploading ${files.length} files...`);
+
+        const formData = new FormData();
+        files.forEach(file => formData.append('files', file));
+
+        try {
+            const res = await fetch(`${BACKEND_URL}/api/pdf/upload/bulk`, {
+                method: 'POST',
+                body: formData,
+            });
+
+            if (!res.ok || !res.body) {
+                const errorData = await res.json().catch(() => ({}));
+                throw new Error(errorData.detail || 'Upload failed');
+            }
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop() || '';
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event = JSON.parse(line);
+                    if (event.type === 'file') {
+                        setUploadProgress(`Indexed ${event.done}${event.total ? ` of ${event.total}` : ''} files...`);
+                        if (event.status === 'success') {
+                            const citation = {
+                                id: Date.now() + Math.random(),
+                                text: event.filename,
+                                link: event.filename
+                            };
+                            addCitation(citation);
+                            uploadedCitations.push(citation);
+                        } else {
+                            console.error(`Upload error for ${event.filename}:`, event.error);
+                        }
+                    } else if (event.type === 'error') {
+                        throw new Error(event.error);
+                    }
+                }
+            }
+        } catch (err: any) {
+            console.error('Upload error:', err);
+            setUploadProgress(`Error: ${err.message}`);
+            throw err;
+        } finally {
+            setIsUploading(false);
+            setUploadProgress(null);
+        }
+        return uploadedCitations;
+    };
+
     const uploadFiles = async (files: File[]) => {
+        if (files.length > 1 || files.some(file => isArchive(file.name))) {
+            return uploadBulk(files);
+        }
+
         const uploadedCitations: any[] = [];
 
         for (const file of files) {
@@ -179,7 +247,7 @@ export const ChatInterface: React.FC = () => {
                     } else if (data.type === 'tool_call') {
                         addToolCall({ id: uuidv4(), name: data.content, status: 'running' });
                     } else if (data.type === 'citation') {
-                        addCitation({ id: data.id, text: data.text, link: data.link });
+                        addCitation({ id: data.id, text: data.text, link: data.link, page: data.page, version: data.version });
                     } else if (data.type === 'error') {
                         updateLastMessage(`\n\nError: ${data.content}`);
                     }
@@ -368,7 +436,7 @@ export const ChatInterface: React.FC = () => {
                                     onChange={handleFileSelect}
                                     className="hidden"
                                     multiple
-                                    accept=".pdf,.txt,.md,.py,.js,.ts,.tsx,.html,.css,.json,.docx,image/*"
+                                    accept=".pdf,.txt,.md,.py,.js,.ts,.tsx,.html,.css,.json,.docx,.zip,.tar,.gz,.tgz,image/*"
                                 />
                                 <input
                                     type="text"
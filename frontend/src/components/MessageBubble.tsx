@@ -21,6 +21,13 @@ export const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
 
     const handleCitationClick = (citation: any) => {
         const filename = citation.link || citation.text || "source_document.pdf";
+        if (citation.page) {
+            // Fetch only the cited page instead of the whole document
+            const version = citation.version ? `?v=${citation.version}` : '';
+            const pageUrl = `${BACKEND_URL}/api/pdf/documents/${encodeURIComponent(filename)}/pages/${citation.page}${version}`;
+            openPDF(pageUrl, 1);
+            return;
+        }
         const pdfUrl = `${BACKEND_URL}/api/pdf/files/${filename}`;
         openPDF(pdfUrl, 1);
     };
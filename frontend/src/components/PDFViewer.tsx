@@ -21,7 +21,8 @@ export const PDFViewer: React.FC = () => {
         setIsClient(true);
         if (pdfViewer.fileUrl) {
             console.log("DEBUG: PDFViewer loading URL:", pdfViewer.fileUrl);
-            const isPdfFile = pdfViewer.fileUrl.toLowerCase().endsWith('.pdf');
+            // Page slices (/api/pdf/documents/<name>/pages/<n>) are PDFs too
+            const isPdfFile = pdfViewer.fileUrl.toLowerCase().endsWith('.pdf') || /\/pages\/\d+(\?|$)/.test(pdfViewer.fileUrl);
             setIsPDF(isPdfFile);
             setError(null);
 
@@ -19,6 +19,8 @@ export interface Citation {
     id: number;
     text: string;
     link?: string;
+    page?: number;
+    version?: string;
 }
 
 export interface UIComponent {
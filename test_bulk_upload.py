@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import sys
+import tarfile
+import zipfile
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.services.bulk_ingest import iter_archive, member_filename
+from backend.services.file_service import file_service
+
+
+def note(i):
+    return f"# Bulk note {i}\n\nThe bulk upload marker for note {i} is token-{i * 7}.\n".encode("utf-8")
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_tar(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def test_member_filenames():
+    assert member_filename("notes/sub/a.md") == "a.md"
+    assert member_filename("__MACOSX/notes/._a.md") is None
+    assert member_filename("notes/.DS_Store") is None
+    assert member_filename("../etc/passwd") is None
+    members = list(iter_archive(io.BytesIO(make_tar({"x/b.txt": b"bee", "x/.hidden": b"no"})), "x.tgz"))
+    assert members == [("b.txt", b"bee", None)]
+
+
+def test_bulk_endpoint():
+    loose = {f"bulk_loose_{i}.md": note(i) for i in range(3)}
+    zipped = {f"notes/bulk_zip_{i}.md": note(10 + i) for i in range(5)}
+    tarred = {f"notes/bulk_tar_{i}.md": note(20 + i) for i in range(4)}
+    files = [("files", (name, content, "text/markdown")) for name, content in loose.items()]
+    files.append(("files", ("notes.zip", make_zip(zipped), "application/zip")))
+    files.append(("files", ("notes.tar.gz", make_tar(tarred), "application/gzip")))
+    names = list(loose) + [member_filename(n) for n in list(zipped) + list(tarred)]
+    try:
+        response = TestClient(app).post("/api/pdf/upload/bulk", files=files)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        file_events = [e for e in events if e["type"] == "file"]
+        summary = events[-1]
+        assert summary["type"] == "summary"
+        assert summary["total"] == len(names) and summary["succeeded"] == len(names), events
+        assert sorted(e["filename"] for e in file_events) == sorted(names)
+        assert [e["done"] for e in file_events] == list(range(1, len(names) + 1))
+        assert all(file_service.catalog.get(name).chunk_count > 0 for name in names)
+        print(f"Bulk ingested {summary['total']} files ({summary['chunks']} chunks) in {summary['seconds']}s")
+    finally:
+        for name in names:
+            file_service.delete_document(name)
+
+
+def test_rejects_path_traversal():
+    client = TestClient(app)
+    outside = os.path.join(os.path.dirname(os.path.abspath(file_service.upload_dir)), "escape_bulk.md")
+    response = client.post("/api/pdf/upload/bulk", files=[("files", ("../escape_bulk.md", note(1), "text/markdown"))])
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["status"] == "error" and events[-1]["succeeded"] == 0, events
+    response = client.post("/api/pdf/upload", files={"file": ("../escape_bulk.md", note(1), "text/markdown")})
+    assert response.status_code == 400
+    assert not os.path.exists(outside)
+    assert file_service.catalog.get("../escape_bulk.md") is None
+
+
+if __name__ == "__main__":
+    test_member_filenames()
+    test_bulk_endpoint()
+    test_rejects_path_traversal()
+    print("Bulk upload tests passed.")
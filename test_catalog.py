@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.services.document_catalog import DocumentCatalog, DocumentRecord
+
+
+def make_record(filename, ingested_at=0.0, chunk_ids=None):
+    return DocumentRecord(
+        filename=filename,
+        digest="0" * 64,
+        size=1024,
+        content_type="txt",
+        chunk_ids=chunk_ids or [],
+        ingested_at=ingested_at,
+        ingest_seconds=0.01,
+    )
+
+
+def test_catalog_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.json")
+        catalog = DocumentCatalog(path)
+        catalog.put(make_record("a.txt", ingested_at=1.0, chunk_ids=["c1", "c2"]))
+        catalog.put(make_record("b.pdf", ingested_at=2.0))
+        catalog.close()
+
+        reloaded = DocumentCatalog(path)
+        assert len(reloaded) == 2
+        assert reloaded.get("a.txt").chunk_ids == ["c1", "c2"]
+        assert [r.filename for r in reloaded.list()] == ["a.txt", "b.pdf"]
+        assert "chunk_ids" not in reloaded.get("a.txt").summary()
+        assert reloaded.get("a.txt").summary()["chunk_count"] == 2
+
+
+def test_catalog_remove_and_expire():
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = DocumentCatalog(os.path.join(tmp, "catalog.json"))
+        catalog.put(make_record("old.txt", ingested_at=100.0))
+        catalog.put(make_record("new.txt", ingested_at=4000.0))
+
+        expired = catalog.expired(3600, now=4000.0)
+        assert [r.filename for r in expired] == ["old.txt"]
+
+        assert catalog.remove("old.txt").filename == "old.txt"
+        assert catalog.remove("old.txt") is None
+        assert [r.filename for r in catalog.clear()] == ["new.txt"]
+        catalog.close()
+        assert len(DocumentCatalog(catalog.path)) == 0
+
+
+def test_catalog_background_saves():
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = DocumentCatalog(os.path.join(tmp, "catalog.json"), save_interval=1.0)
+        records = [make_record(f"doc_{i}.txt", chunk_ids=[f"doc_{i}.txt:{j}" for j in range(150)]) for i in range(2000)]
+        for record in records:
+            catalog.put(record)
+        # A put on a large catalog does not rewrite the file
+        started = time.perf_counter()
+        catalog.put(make_record("last.txt"))
+        assert time.perf_counter() - started < 0.02
+        assert not os.path.exists(catalog.path)
+
+        # The saver thread writes the batch of changes shortly after
+        deadline = time.monotonic() + 10
+        while not os.path.exists(catalog.path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        catalog.close()
+        assert len(DocumentCatalog(catalog.path)) == 2001
+
+
+def test_catalog_list_during_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = DocumentCatalog(os.path.join(tmp, "catalog.json"))
+        errors = []
+        # Switch threads often so reads overlap the writer's dict updates
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        def write():
+            for i in range(2000):
+                catalog.put(make_record(f"doc_{i}.txt", ingested_at=float(i)))
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while writer.is_alive():
+            try:
+                catalog.list()
+                catalog.expired(3600, now=1000.0)
+            except RuntimeError as e:
+                errors.append(e)
+        writer.join()
+        sys.setswitchinterval(interval)
+        assert not errors, errors[0]
+        assert len(catalog.list()) == 2000
+        catalog.close()
+
+
+def test_reset_removes_uncatalogued_data():
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from backend.services.file_service import FileService
+    from backend.services.vector_index import NumpyVectorStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A service of its own on temp directories: reset wipes everything it owns
+        service = FileService(upload_dir=os.path.join(tmp, "uploads"), catalog_path=os.path.join(tmp, "catalog.json"))
+        service._embeddings = DeterministicFakeEmbedding(size=32)
+        service._vector_store = NumpyVectorStore(os.path.join(tmp, "index"), service._embeddings)
+        try:
+            service.catalog.put(make_record("kept.txt", chunk_ids=["kept.txt:0"]))
+            service.index_writer.add([Document(page_content="catalogued chunk")], ["kept.txt:0"]).result()
+            # A chunk and an upload that never made it into the catalog (e.g. a failed ingest)
+            service.index_writer.add([Document(page_content="orphaned chunk")], ["orphan.txt:0"]).result()
+            orphan_path = os.path.join(service.upload_dir, "orphan.txt")
+            with open(orphan_path, "w", encoding="utf-8") as f:
+                f.write("orphaned chunk")
+
+            assert service.reset_vector_store()
+            assert service._stored_ids() == []
+            assert not os.path.exists(orphan_path)
+            assert len(service.catalog) == 0
+        finally:
+            service.index_writer.close()
+            service.catalog.close()
+
+
+if __name__ == "__main__":
+    test_catalog_roundtrip()
+    test_catalog_remove_and_expire()
+    test_catalog_background_saves()
+    test_catalog_list_during_writes()
+    test_reset_removes_uncatalogued_data()
+    print("Catalog tests passed.")
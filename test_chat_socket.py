@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core.config import settings
+from backend.services import agent_service as agent_module
+from backend.services.fake_llm import FakeStreamingChatModel
+
+
+def use_fake_model(**kwargs):
+    previous = agent_module._model
+    agent_module._model = FakeStreamingChatModel(first_token_latency=0, **kwargs)
+    agent_module.agent_service._app = None
+    return previous
+
+
+def restore_model(previous):
+    agent_module._model = previous
+    agent_module.agent_service._app = None
+
+
+def receive_until_done(ws, jobs, events=None):
+    """Collect frames until every job in `jobs` has a terminal event; returns {job: [events]}."""
+    events = events or {job: [] for job in jobs}
+    open_jobs = set(jobs)
+    while open_jobs:
+        frame = ws.receive_json()
+        assert frame["j"] is not None, frame
+        assert frame["s"] == len(events[frame["j"]]), "sequence numbers must be contiguous per job"
+        events[frame["j"]].append(frame["e"])
+        if frame["e"]["type"] in ("done", "cancelled"):
+            open_jobs.discard(frame["j"])
+    return events
+
+
+def text_of(events):
+    return "".join(e["content"] for e in events if e["type"] == "text")
+
+
+def test_multiplexed_turns():
+    previous = use_fake_model(tokens_per_second=0, response_tokens=12, tool_pattern="list")
+    try:
+        with TestClient(app).websocket_connect("/api/chat/ws") as ws:
+            hello = ws.receive_json()
+            assert hello["j"] is None and hello["e"]["content"] == "connected"
+            ws.send_json({"op": "start", "j": "a", "q": "first question", "t": "ws-thread-1"})
+            ws.send_json({"op": "start", "j": "b", "q": "second question", "t": "ws-thread-2"})
+            events = receive_until_done(ws, ["a", "b"])
+            for job in ("a", "b"):
+                assert events[job][-1]["type"] == "done"
+                assert any(e["type"] == "tool_call" for e in events[job])
+                assert len(text_of(events[job]).split()) == 12
+            assert text_of(events["a"]) != text_of(events["b"])
+    finally:
+        restore_model(previous)
+
+
+def test_flow_control_merges_backlog():
+    previous = use_fake_model(tokens_per_second=0, response_tokens=40)
+    credit = settings.WS_INITIAL_CREDIT
+    settings.WS_INITIAL_CREDIT = 2
+    try:
+        with TestClient(app).websocket_connect("/api/chat/ws") as ws:
+            assert ws.receive_json()["e"]["credit"] == 2
+            ws.send_json({"op": "start", "j": "slow-reader", "q": "a long answer please"})
+            first = [ws.receive_json()["e"], ws.receive_json()["e"]]
+            # Let the turn finish while the client has no credit left
+            time.sleep(0.3)
+            ws.send_json({"op": "credit", "n": 100})
+            events = receive_until_done(ws, ["slow-reader"], {"slow-reader": first})["slow-reader"]
+    finally:
+        settings.WS_INITIAL_CREDIT = credit
+        restore_model(previous)
+    assert len(events) < 40, "backlogged text events should be merged"
+    assert len(text_of(events).split()) == 40
+
+
+def test_cancel():
+    previous = use_fake_model(tokens_per_second=20, response_tokens=200)
+    try:
+        with TestClient(app).websocket_connect("/api/chat/ws") as ws:
+            ws.receive_json()
+            ws.send_json({"op": "start", "j": "c", "q": "never mind"})
+            while ws.receive_json()["e"]["type"] != "text":
+                pass
+            ws.send_json({"op": "cancel", "j": "c"})
+            while True:
+                event = ws.receive_json()["e"]
+                if event["type"] in ("done", "cancelled"):
+                    break
+            assert event["type"] == "cancelled"
+            ws.send_json({"op": "bogus"})
+            assert ws.receive_json()["e"]["type"] == "error"
+    finally:
+        restore_model(previous)
+
+
+if __name__ == "__main__":
+    test_multiplexed_turns()
+    test_flow_control_merges_backlog()
+    test_cancel()
+    print("Chat WebSocket tests passed.")
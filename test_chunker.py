@@ -0,0 +1,110 @@
+import json
+import os
+import random
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.services.chunker import chunk_pages, count_tokens, iter_chunks
+
+SENTENCES = " ".join(f"Sentence number {i} describes topic {i % 7} in some detail." for i in range(60))
+MARKDOWN = f"""# Guide
+
+Short introduction.
+
+## Install
+
+{SENTENCES}
+
+```python
+def main():
+
+    return 42
+```
+
+## Usage
+
+Run the tool.
+"""
+
+
+def assert_offsets(text, chunks):
+    for chunk in chunks:
+        first_line = chunk.text.split("\n", 1)[0]
+        last_line = chunk.text.rsplit("\n", 1)[-1]
+        assert text[chunk.start:chunk.start + len(first_line)] == first_line
+        assert text[chunk.end - len(last_line):chunk.end] == last_line
+
+
+def test_markdown_structure():
+    chunks = list(iter_chunks([MARKDOWN], target_tokens=60, max_tokens=90))
+    assert_offsets(MARKDOWN, chunks)
+    assert all(c.tokens <= 90 for c in chunks)
+    # Each heading starts a chunk and is recorded as its section
+    assert chunks[0].text.startswith("# Guide") and chunks[0].section == "Guide"
+    assert chunks[1].text.startswith("## Install") and chunks[1].section == "Install"
+    assert chunks[-1].text.startswith("## Usage") and chunks[-1].section == "Usage"
+    # The long paragraph is cut at sentence ends into evenly sized chunks
+    install = [c for c in chunks if c.section == "Install"]
+    assert all(c.text.rstrip().endswith((".", "```")) for c in install)
+    sizes = [c.tokens for c in install if "```" not in c.text]
+    assert max(sizes) - min(sizes) < 20, sizes
+    # The fenced block (with its blank line) stays in one piece
+    assert any("def main():\n\n    return 42\n```" in c.text for c in chunks)
+
+
+def test_streamed_input_matches_whole_text():
+    rng = random.Random(3)
+    pieces = []
+    position = 0
+    while position < len(MARKDOWN):
+        size = rng.randint(1, 40)
+        pieces.append(MARKDOWN[position:position + size])
+        position += size
+    assert list(iter_chunks(pieces, target_tokens=60)) == list(iter_chunks([MARKDOWN], target_tokens=60))
+
+
+def test_json_split_at_elements():
+    text = json.dumps([{"id": i, "name": f"item {i}", "tags": ["a", "b, c"]} for i in range(100)])
+    chunks = list(iter_chunks([text], target_tokens=80, code=True))
+    assert len(chunks) > 1
+    assert chunks[0].text.startswith("[{") and all(c.text.startswith("{") for c in chunks[1:])
+    assert all(c.text.endswith(("},", "}]")) for c in chunks)
+    assert " ".join(c.text for c in chunks) == text
+
+
+def test_pages_and_runts():
+    pages = [(1, SENTENCES), (2, "Only a short page.")]
+    chunks = list(chunk_pages(pages, target_tokens=100))
+    assert {c.page for c in chunks} == {1, 2}
+    assert [c.text for c in chunks if c.page == 2] == ["Only a short page."]
+    # A short tail is merged into the previous chunk instead of standing alone
+    tail = list(iter_chunks([SENTENCES + "\n\nThe end."], target_tokens=100))
+    assert tail[-1].text.endswith("\n\nThe end.") and tail[-1].tokens > 10
+    # Text without any boundaries still respects the size limit
+    words = list(iter_chunks([" ".join(["word"] * 1000)], target_tokens=100))
+    assert len(words) == 10 and all(count_tokens(c.text) <= 150 for c in words)
+
+
+def test_text_without_spaces_is_capped():
+    cjk = "検索拡張生成は文書を小さな断片に分割して埋め込みます。" * 55
+    chunks = list(iter_chunks([cjk], target_tokens=96, max_tokens=144, max_chars=1000))
+    assert len(chunks) > 1 and all(c.tokens <= 144 for c in chunks)
+    assert all(c.text.endswith("。") for c in chunks)
+    assert "".join(c.text for c in chunks) == cjk
+
+    blob = "x" * 20000
+    chunks = list(iter_chunks([blob], target_tokens=96, max_chars=1000))
+    assert len(chunks) == 20 and all(len(c.text) <= 1000 for c in chunks)
+    assert "".join(c.text for c in chunks) == blob
+    assert_offsets(blob, chunks)
+
+
+if __name__ == "__main__":
+    test_markdown_structure()
+    test_streamed_input_matches_whole_text()
+    test_json_split_at_elements()
+    test_pages_and_runts()
+    test_text_without_spaces_is_capped()
+    print("Chunker tests passed.")
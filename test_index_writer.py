@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+import threading
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+from backend.services.index_writer import IndexWriter
+
+
+class RecordingStore:
+    """Minimal vector store stand-in that logs every write call."""
+
+    def __init__(self, fail_on=None):
+        self.ids = set()
+        self.calls = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def add_documents(self, documents, ids):
+        if self.fail_on in ids:
+            raise ValueError(f"bad chunk {self.fail_on}")
+        with self.lock:
+            self.calls.append(("add", list(ids)))
+            self.ids.update(ids)
+
+    def delete(self, ids):
+        with self.lock:
+            self.calls.append(("delete", list(ids)))
+            self.ids.difference_update(ids)
+
+
+def docs(prefix, n):
+    return [Document(page_content=f"{prefix} {i}") for i in range(n)], [f"{prefix}-{i}" for i in range(n)]
+
+
+def test_concurrent_adds_are_coalesced():
+    store = RecordingStore()
+    writer = IndexWriter(lambda: store, batch_size=100, flush_interval=0.05)
+
+    async def upload(name):
+        with writer.producer():
+            documents, ids = docs(name, 5)
+            await asyncio.sleep(0.001)
+            await writer.aadd(documents, ids)
+            # Read-after-write: once acknowledged the chunks are in the store
+            assert set(ids) <= store.ids
+
+    async def run():
+        await asyncio.gather(*(upload(f"doc{i}") for i in range(20)))
+
+    asyncio.run(run())
+    writer.close()
+    assert len(store.ids) == 100
+    assert len(store.calls) < 20, f"expected coalesced flushes, got {len(store.calls)}"
+    assert writer.stats["requests"] == 20
+
+
+def test_batch_size_and_ordering():
+    store = RecordingStore()
+    writer = IndexWriter(lambda: store, batch_size=10, flush_interval=0.05)
+    futures = [writer.add(*docs("a", 6)), writer.add(*docs("b", 6)), writer.delete(["a-0"]), writer.add(*docs("c", 2))]
+    for future in futures:
+        future.result(timeout=5)
+    writer.close()
+    # b does not fit in a's batch; the delete is applied after both adds and before c
+    assert [kind for kind, _ in store.calls] == ["add", "add", "delete", "add"]
+    assert all(len(ids) <= 10 for kind, ids in store.calls if kind == "add")
+    assert "a-0" not in store.ids and "c-1" in store.ids
+
+
+def test_failed_request_does_not_fail_batch():
+    store = RecordingStore(fail_on="bad-1")
+    writer = IndexWriter(lambda: store, batch_size=100, flush_interval=0.05)
+    good = writer.add(*docs("good", 3))
+    bad = writer.add(*docs("bad", 3))
+    assert good.result(timeout=5) == ["good-0", "good-1", "good-2"]
+    assert isinstance(bad.exception(timeout=5), ValueError)
+    writer.close()
+    assert store.ids == {"good-0", "good-1", "good-2"}
+
+
+if __name__ == "__main__":
+    test_concurrent_adds_are_coalesced()
+    test_batch_size_and_ordering()
+    test_failed_request_does_not_fail_batch()
+    print("Index writer tests passed.")
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def test_load_harness_smoke():
+    """A tiny offline load run must complete every turn without errors."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "load.json")
+        subprocess.run(
+            [sys.executable, "benchmarks/load_test.py", "--concurrency", "5", "--turns", "10",
+             "--tool-pattern", "mixed", "--tokens-per-second", "0", "--first-token-latency", "0.01",
+             "--port", "8766", "--output", output],
+            cwd=os.getcwd(), check=True, capture_output=True
+        )
+        with open(output, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    print(json.dumps({k: result[k] for k in ("completed", "errors", "ttft_ms", "tokens_per_second")}))
+    assert result["errors"] == 0, result["error_samples"]
+    assert result["completed"] == 10
+    assert result["ttft_ms"]["p50"] > 0
+
+
+if __name__ == "__main__":
+    test_load_harness_smoke()
+    print("Load harness smoke test passed.")
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.core import telemetry
+from backend.services import agent_service as agent_module
+from backend.services.fake_llm import FakeStreamingChatModel
+
+
+def sample(name, labels=None):
+    return telemetry.REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for series in ("chat_turn_seconds", "agent_llm_ttft_seconds", "agent_tool_seconds", "retrieval_stage_seconds",
+                   "ingest_stage_seconds", "sse_frames_total", "chat_active_jobs", "process_threads"):
+        assert series in response.text, series
+
+
+def test_agent_turn_metrics():
+    """One scripted turn with a tool call records LLM, token and tool metrics."""
+    model = FakeStreamingChatModel(first_token_latency=0, tokens_per_second=0, response_tokens=5, tool_pattern="list")
+    previous_model = agent_module._model
+    agent_module._model = model
+    ttft_before = sample("agent_llm_ttft_seconds_count")
+    tokens_before = sample("agent_llm_tokens_total", {"kind": "completion"})
+    tool_before = sample("agent_tool_seconds_count", {"tool": "list_documents"})
+
+    async def run():
+        service = agent_module.AgentService()
+        return [json.loads(e) async for e in service.stream_response("what files are there?", thread_id="metrics-test")]
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        agent_module._model = previous_model
+    assert any(e["type"] == "text" for e in events)
+    # Two model calls: the tool call and the final answer
+    assert sample("agent_llm_ttft_seconds_count") - ttft_before == 2
+    assert sample("agent_llm_tokens_total", {"kind": "completion"}) - tokens_before == 6
+    assert sample("agent_tool_seconds_count", {"tool": "list_documents"}) - tool_before == 1
+
+
+def test_sse_frame_and_byte_counters_agree():
+    """Every SSE frame, including "connected" and [DONE], is counted in both frames and bytes."""
+    model = FakeStreamingChatModel(first_token_latency=0, tokens_per_second=0, response_tokens=3, tool_pattern="none")
+    previous_model = agent_module._model
+    agent_module._model = model
+    frames_before = sample("sse_frames_total")
+    bytes_before = sample("sse_bytes_total")
+    try:
+        client = TestClient(app)
+        job_id = client.post("/api/chat", json={"query": "hello"}).json()["job_id"]
+        body = client.get(f"/api/chat/stream/{job_id}", params={"thread_id": "sse-metrics-test"}).content
+    finally:
+        agent_module._model = previous_model
+    assert body.startswith(b"data: ") and body.endswith(b"data: [DONE]\n\n")
+    assert sample("sse_frames_total") - frames_before == body.count(b"\n\n")
+    assert sample("sse_bytes_total") - bytes_before == len(body)
+
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    test_agent_turn_metrics()
+    test_sse_frame_and_byte_counters_agree()
+    print("Metrics tests passed.")
@@ -0,0 +1,83 @@
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from PIL import Image
+from backend.services.file_service import file_service
+from backend.services.ocr_service import OCRCache, StubOCREngine, ocr_queue
+from backend.services.page_service import PageCache
+
+
+def wait_for_ocr(filename, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = file_service.catalog.get(filename)
+        if record and record.ocr_status != "pending":
+            return record
+        time.sleep(0.05)
+    raise AssertionError(f"OCR of {filename} did not finish")
+
+
+def scanned_pdf() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 100), "white").save(buffer, format="PDF")
+    return buffer.getvalue()
+
+
+def test_deferred_ocr():
+    async def run():
+        engine = StubOCREngine(text="Scanned invoice number 4711, total due 99 EUR.", delay=0.5)
+        previous_engine, previous_cache = ocr_queue.engine, ocr_queue.cache
+        ocr_queue.engine = engine
+        ocr_queue.cache = OCRCache(tempfile.mkdtemp(prefix="ocr_cache_"))
+        image_name, pdf_name = "ocr_test.png", "ocr_scan_test.pdf"
+        image = b"\x89PNG fake image bytes"
+        try:
+            # The upload is acknowledged before OCR has run
+            started = time.perf_counter()
+            await file_service.ingest_file(image, image_name)
+            assert time.perf_counter() - started < engine.delay
+            assert file_service.catalog.get(image_name).ocr_status == "pending"
+
+            record = await asyncio.to_thread(wait_for_ocr, image_name)
+            assert record.ocr_status == "done" and record.chunk_count > 0
+            chunks = file_service.vector_store.get_by_ids(record.chunk_ids)
+            assert chunks and all(c.metadata.get("ocr") for c in chunks)
+            assert "invoice number 4711" in chunks[0].page_content
+
+            # Same image again (after a delete): the OCR cache answers, the engine is not called
+            calls = engine.calls
+            file_service.delete_document(image_name)
+            await file_service.ingest_file(image, image_name)
+            await asyncio.to_thread(wait_for_ocr, image_name)
+            assert engine.calls == calls
+
+            # A PDF page without a text layer is OCR'd from its embedded scan
+            engine.text = "Page one of the scanned contract."
+            await file_service.ingest_file(scanned_pdf(), pdf_name)
+            record = await asyncio.to_thread(wait_for_ocr, pdf_name)
+            chunks = file_service.vector_store.get_by_ids(record.chunk_ids)
+            assert record.ocr_status == "done"
+            assert [c.metadata.get("page") for c in chunks] == [1]
+
+            # Its page text is the OCR text, not the empty text layer
+            pages = PageCache(tempfile.mkdtemp(prefix="page_cache_"), 10**6)
+            source = os.path.join(file_service.upload_dir, pdf_name)
+            assert pages.page_text(record, source, 1) == "Page one of the scanned contract."
+        finally:
+            for name in (image_name, pdf_name):
+                file_service.delete_document(name)
+            ocr_queue.engine, ocr_queue.cache = previous_engine, previous_cache
+
+    asyncio.run(run())
+    print("Deferred OCR test passed.")
+
+
+if __name__ == "__main__":
+    test_deferred_ocr()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.services.document_catalog import DocumentRecord
+from backend.services.file_service import file_service
+from backend.services.page_service import PageCache
+from benchmarks.corpus import make_pdf
+
+
+def test_page_cache_eviction():
+    content = make_pdf(["alpha", "beta", "gamma"])
+    record = DocumentRecord("cache.pdf", hashlib.sha256(content).hexdigest(), len(content), "pdf", page_count=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "cache.pdf")
+        with open(source, "wb") as f:
+            f.write(content)
+        slice_size = len(PageCache(os.path.join(tmp, "probe"), 10**9).page_pdf(record, source, 1))
+        cache = PageCache(os.path.join(tmp, "cache"), max_bytes=int(slice_size * 2.5))
+        for page in (1, 2, 3):
+            cache.page_pdf(record, source, page)
+        assert len(os.listdir(cache.cache_dir)) == 2, "Oldest slice should have been evicted"
+        assert cache.page_text(record, source, 2).strip() == "beta"
+
+
+def test_page_cache_concurrent_eviction():
+    content = make_pdf(["alpha", "beta", "gamma"])
+    record = DocumentRecord("race.pdf", hashlib.sha256(content).hexdigest(), len(content), "pdf", page_count=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "race.pdf")
+        with open(source, "wb") as f:
+            f.write(content)
+        # Room for one slice: every miss evicts what other threads are reading
+        cache = PageCache(os.path.join(tmp, "cache"), max_bytes=1000)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            slices = list(pool.map(lambda i: cache.page_pdf(record, source, i % 3 + 1), range(120)))
+        assert all(s.startswith(b"%PDF") for s in slices)
+
+
+def test_page_endpoints():
+    filename = "page_slices_test.pdf"
+    content = make_pdf(["first page", "second page", "third page"])
+    path = os.path.join(file_service.upload_dir, filename)
+    with open(path, "wb") as f:
+        f.write(content)
+    record = DocumentRecord(filename, hashlib.sha256(content).hexdigest(), len(content), "pdf", page_count=3)
+    file_service.catalog.put(record)
+    try:
+        client = TestClient(app)
+        response = client.get(f"/api/pdf/documents/{filename}/pages/2/text")
+        assert response.status_code == 200
+        assert response.text.strip() == "second page"
+
+        response = client.get(f"/api/pdf/documents/{filename}/pages/2?v={record.digest[:12]}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content.startswith(b"%PDF")
+        assert len(response.content) < len(content)
+        etag = response.headers["etag"]
+
+        assert client.get(f"/api/pdf/documents/{filename}/pages/2", headers={"If-None-Match": etag}).status_code == 304
+        partial = client.get(f"/api/pdf/documents/{filename}/pages/2", headers={"Range": "bytes=0-3"})
+        assert partial.status_code == 206 and partial.content == b"%PDF"
+        suffix = client.get(f"/api/pdf/documents/{filename}/pages/2", headers={"Range": "bytes=-5"})
+        assert suffix.status_code == 206 and suffix.content == response.content[-5:]
+        assert client.get(f"/api/pdf/documents/{filename}/pages/9").status_code == 404
+    finally:
+        file_service.catalog.remove(filename)
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_page_cache_eviction()
+    test_page_cache_concurrent_eviction()
+    test_page_endpoints()
+    print("Page slice tests passed.")
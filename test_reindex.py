@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from backend.services.file_service import file_service
+
+
+def test_incremental_reindex():
+    async def run():
+        filename = "reindex_test.md"
+        paragraphs = [f"Paragraph {i}: " + ("lorem ipsum dolor sit amet " * 8) for i in range(20)]
+        original = "\n\n".join(paragraphs).encode("utf-8")
+
+        print(f"Ingesting {filename}...")
+        await file_service.ingest_file(original, filename)
+        first = file_service.catalog.get(filename)
+        assert first and first.chunk_count > 0
+        print(f"First ingest: {first.chunk_count} chunks")
+
+        # Re-uploading identical content must not touch the vector store
+        await file_service.ingest_file(original, filename)
+        assert file_service.catalog.get(filename).chunk_ids == first.chunk_ids
+
+        # Edit a single paragraph: most chunk ids must survive
+        paragraphs[10] = "Paragraph 10: the edited paragraph now talks about incremental indexing."
+        edited = "\n\n".join(paragraphs).encode("utf-8")
+        await file_service.ingest_file(edited, filename)
+        second = file_service.catalog.get(filename)
+        kept = set(first.chunk_ids) & set(second.chunk_ids)
+        print(f"Re-ingest: kept {len(kept)}, added {len(set(second.chunk_ids) - kept)}, removed {len(set(first.chunk_ids) - kept)}")
+        assert len(kept) >= first.chunk_count - 3
+
+        # The edit shortened paragraph 10: offsets of the kept chunks after it moved too
+        text = edited.decode("utf-8")
+        for doc in file_service.vector_store.get_by_ids(second.chunk_ids):
+            start, end = doc.metadata["start_index"], doc.metadata["end_index"]
+            assert text[start:end].startswith(doc.page_content[:20]), doc.id
+
+        # Retrieval must not return duplicate passages
+        docs = await file_service.get_retriever().ainvoke("edited paragraph incremental indexing")
+        contents = [d.page_content for d in docs]
+        assert len(contents) == len(set(contents)), "Duplicate chunks returned"
+
+        assert file_service.delete_document(filename)
+        assert file_service.catalog.get(filename) is None
+
+    asyncio.run(run())
+    print("Incremental re-index test passed.")
+
+
+if __name__ == "__main__":
+    test_incremental_reindex()
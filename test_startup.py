@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Cold-start budgets in seconds; override for slow CI machines
+IMPORT_BUDGET = float(os.environ.get("STARTUP_IMPORT_BUDGET", 3.0))
+FIRST_REQUEST_BUDGET = float(os.environ.get("STARTUP_FIRST_REQUEST_BUDGET", 4.0))
+
+HEAVY_MODULES = ["langchain_chroma", "chromadb", "fastembed", "langchain_groq", "langgraph.graph"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.main
+imported = time.perf_counter() - started
+from fastapi.testclient import TestClient
+with TestClient(backend.main.app) as client:
+    response = client.get("/api/health/live")
+    first_request = time.perf_counter() - started
+    ready = client.get("/api/health/ready").json()
+print(json.dumps({
+    "import_seconds": imported,
+    "first_request_seconds": first_request,
+    "status": response.status_code,
+    "ready": ready,
+    "heavy_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_probe():
+    env = dict(os.environ, WARMUP_ON_STARTUP="false")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=os.getcwd(), env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_cold_start_budget():
+    result = run_probe()
+    print(f"import: {result['import_seconds']:.2f}s, first request: {result['first_request_seconds']:.2f}s")
+    assert result["status"] == 200
+    assert result["heavy_loaded"] == [], f"Heavy modules imported eagerly: {result['heavy_loaded']}"
+    assert result["ready"]["status"] == "starting"
+    assert result["import_seconds"] < IMPORT_BUDGET
+    assert result["first_request_seconds"] < FIRST_REQUEST_BUDGET
+
+
+def test_search_waits_for_warmup_off_the_event_loop():
+    # Add project root to path
+    sys.path.append(os.getcwd())
+    from backend.services.file_service import file_service
+
+    async def search_during_warmup():
+        file_service._embeddings = None
+        loading, done = threading.Event(), threading.Event()
+
+        def warmup():
+            # Stand-in for a slow model load holding the init lock
+            with file_service._init_lock:
+                loading.set()
+                # Bounded, so a blocked event loop fails the test instead of deadlocking
+                done.wait(2.0)
+
+        threading.Thread(target=warmup, daemon=True).start()
+        loading.wait()
+        search = asyncio.create_task(file_service.asearch("warmup", k=1))
+        started = time.perf_counter()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        stalled = time.perf_counter() - started
+        assert not search.done()
+        done.set()
+        await search
+        return stalled
+
+    stalled = asyncio.run(search_during_warmup())
+    assert stalled < 1.0, f"Event loop blocked for {stalled:.2f}s"
+
+
+if __name__ == "__main__":
+    test_cold_start_budget()
+    test_search_waits_for_warmup_off_the_event_loop()
+    print("Startup budget test passed.")
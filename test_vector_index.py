@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from backend.services.vector_index import NumpyVectorStore
+
+
+def exact_top_k(matrix, query, k):
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = query / np.linalg.norm(query)
+    return list(np.argsort(-(matrix @ query))[:k])
+
+
+def test_search_matches_exact_ranking():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 64)).astype(np.float32)
+    texts = [f"doc-{i}" for i in range(len(vectors))]
+    for dtype, rescore, resident in [("float16", False, True), ("int8", False, True), ("int8", True, True),
+                                     ("float16", False, False), ("int8", False, False)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore(tmp, DeterministicFakeEmbedding(size=64), dtype=dtype, rescore=rescore,
+                                     resident=resident)
+            store.add_embeddings(texts, vectors.tolist(), ids=texts)
+            hits = 0
+            for q in range(20):
+                query = vectors[q] + rng.normal(scale=0.1, size=64).astype(np.float32)
+                expected = {f"doc-{i}" for i in exact_top_k(vectors, query, 10)}
+                found = {doc.page_content for doc in store.similarity_search_by_vector(query.tolist(), k=10)}
+                hits += len(expected & found)
+            recall = hits / 200
+            print(f"{dtype} rescore={rescore} resident={resident}: recall@10 = {recall:.3f}")
+            assert recall >= 0.9
+
+
+def test_delete_upsert_and_reload():
+    embedding = DeterministicFakeEmbedding(size=32)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(tmp, embedding)
+        store.add_documents(
+            [Document(page_content=f"chunk {i}", metadata={"source": "a.txt" if i < 5 else "b.txt"}) for i in range(10)],
+            ids=[f"id-{i}" for i in range(10)],
+        )
+        assert store.delete(ids=["id-0", "id-1"])
+        # Re-adding an id replaces its row
+        store.add_texts(["chunk 2 v2"], metadatas=[{"source": "a.txt"}], ids=["id-2"])
+        assert len(store) == 8
+        # The appended row is searchable right away (resident matrix extended in place)
+        assert store.similarity_search("chunk 2 v2", k=1)[0].id == "id-2"
+
+        # Metadata updates leave the row (and its vector) in place
+        assert store.update_metadata(["id-3", "missing"], [{"source": "a.txt", "start_index": 40}]) == 1
+
+        reloaded = NumpyVectorStore(tmp, embedding)
+        assert len(reloaded) == 8
+        assert reloaded.get_by_ids(["id-3"])[0].metadata == {"source": "a.txt", "start_index": 40}
+        assert reloaded.get_by_ids(["id-0", "id-2"])[0].page_content == "chunk 2 v2"
+        results = reloaded.similarity_search("chunk 3", k=20, filter={"source": "a.txt"})
+        assert {doc.id for doc in results} == {"id-2", "id-3", "id-4"}
+
+        # Enough tombstones trigger compaction; ids and search survive it
+        reloaded.delete(ids=[f"id-{i}" for i in range(5, 10)])
+        assert len(reloaded._ids) == len(reloaded) == 3
+        retriever = reloaded.as_retriever(search_kwargs={"k": 10})
+        assert {doc.id for doc in retriever.invoke("chunk")} == {"id-2", "id-3", "id-4"}
+        assert len(NumpyVectorStore(tmp, embedding)) == 3
+
+
+def test_search_overlapping_compaction():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(100, 32)).astype(np.float32)
+    texts = [f"doc-{i}" for i in range(len(vectors))]
+    for resident in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore(tmp, DeterministicFakeEmbedding(size=32), resident=resident)
+            store.add_embeddings(texts, vectors.tolist(), ids=texts, metadatas=[{"n": i} for i in range(100)])
+            filter_mask = store._filter_mask
+
+            def delete_during_search(*args):
+                # Runs after the search took its snapshot and scored it: 40% tombstones force a compaction
+                store._filter_mask = filter_mask
+                thread = threading.Thread(target=store.delete, args=([f"doc-{i}" for i in range(40)],))
+                thread.start()
+                thread.join()
+                assert len(store._ids) == 60
+                return filter_mask(*args)
+
+            store._filter_mask = delete_during_search
+            results = store.similarity_search_with_score_by_vector(vectors[90].tolist(), k=5)
+            assert store._filter_mask is filter_mask, "search did not overlap the compaction"
+            assert results[0][0].id == "doc-90"
+            assert all(doc.page_content == doc.id and doc.metadata["n"] == int(doc.id[4:]) for doc, _ in results)
+            assert store.similarity_search_by_vector(vectors[90].tolist(), k=1)[0].id == "doc-90"
+
+
+if __name__ == "__main__":
+    test_search_matches_exact_ranking()
+    test_delete_upsert_and_reload()
+    test_search_overlapping_compaction()
+    print("Vector index tests passed.")